@@ -0,0 +1,434 @@
+"""Hojas de badges imprimibles (PDF) para el modo acreditación.
+
+Cada badge usa los mismos campos compilados que el `.pkpass` (`compile_fields`),
+el strip y el logo ya procesados en el `PassContext` y un QR generado en memoria
+a partir del identificador (sin releer los PNG de `output/qr`).
+
+La plantilla del badge (fondo, logo y strip) se rasteriza y se escribe en el PDF
+una sola vez y todas las páginas la referencian. Por badge solo se añade la zona
+de texto y el QR como imagen de 1 bit. Las páginas se vuelcan al fichero según
+se completan, así que la memoria no crece con el número de badges.
+"""
+
+import io
+import logging
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from .generate import PASSKIT_STYLE, PassContext, PassJob, compile_fields, locale_bundle
+
+logger = logging.getLogger(__name__)
+
+# A4 en milímetros y rejillas (columnas, filas) admitidas
+PAGE_SIZE_MM = (210, 297)
+PAGE_MARGIN_MM = 8
+BADGE_GAP_MM = 4
+GRIDS = {1: (1, 1), 2: (1, 2), 4: (2, 2), 6: (2, 3), 8: (2, 4)}
+QR_BORDER = 2
+
+# Fuentes del sistema con acentos y ñ; si no hay ninguna, la fuente de Pillow
+BADGE_FONTS = ["DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "Helvetica.ttc"]
+
+
+class PdfStream:
+    """Escritor PDF mínimo que vuelca cada objeto al fichero en cuanto se crea.
+
+    Al cerrar solo queda por escribir el árbol de páginas, el catálogo y la
+    tabla xref.
+    """
+
+    def __init__(self, fp: BinaryIO, width_pt: float, height_pt: float):
+        self.fp = fp
+        self.width_pt = width_pt
+        self.height_pt = height_pt
+        self._offsets: dict[int, int] = {}
+        self._kids: list[int] = []
+        self._next_id = 3  # 1 = catálogo, 2 = árbol de páginas
+        fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_obj(self, body: bytes, stream: bytes | None = None, obj_id: int | None = None) -> int:
+        if obj_id is None:
+            obj_id = self._next_id
+            self._next_id += 1
+        self._offsets[obj_id] = self.fp.tell()
+        self.fp.write(f"{obj_id} 0 obj\n".encode())
+        self.fp.write(body)
+        if stream is not None:
+            self.fp.write(b"\nstream\n")
+            self.fp.write(stream)
+            self.fp.write(b"\nendstream")
+        self.fp.write(b"\nendobj\n")
+        return obj_id
+
+    def add_image(self, img, quality: int = 90) -> int:
+        """Añade una imagen RGB (JPEG) y devuelve su número de objeto."""
+        buffer = io.BytesIO()
+        img.convert("RGB").save(buffer, format="JPEG", quality=quality, subsampling=0)
+        jpeg = buffer.getvalue()
+        return self._write_obj(
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode "
+                f"/Length {len(jpeg)} >>"
+            ).encode(),
+            jpeg,
+        )
+
+    def add_bitmap(self, rows: list[list[bool]]) -> int:
+        """Añade una imagen de 1 bit (True = negro), p. ej. la matriz de un QR."""
+        width = len(rows[0])
+        packed = bytearray()
+        for row in rows:
+            bits = "".join("0" if dark else "1" for dark in row)
+            bits += "1" * (-len(bits) % 8)
+            packed += int(bits, 2).to_bytes(len(bits) // 8, "big")
+        data = zlib.compress(bytes(packed))
+        return self._write_obj(
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {len(rows)} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode "
+                f"/Length {len(data)} >>"
+            ).encode(),
+            data,
+        )
+
+    def add_page(self, content: bytes, xobjects: dict[str, int]):
+        content = zlib.compress(content)
+        content_id = self._write_obj(
+            f"<< /Length {len(content)} /Filter /FlateDecode >>".encode(), content
+        )
+        refs = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in xobjects.items())
+        page_id = self._write_obj(
+            (
+                f"<< /Type /Page /Parent 2 0 R "
+                f"/MediaBox [0 0 {self.width_pt:.2f} {self.height_pt:.2f}] "
+                f"/Resources << /XObject << {refs} >> >> "
+                f"/Contents {content_id} 0 R >>"
+            ).encode()
+        )
+        self._kids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{kid} 0 R" for kid in self._kids)
+        self._write_obj(
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>".encode(), obj_id=2
+        )
+        self._write_obj(b"<< /Type /Catalog /Pages 2 0 R >>", obj_id=1)
+
+        xref_offset = self.fp.tell()
+        size = self._next_id
+        self.fp.write(f"xref\n0 {size}\n".encode())
+        self.fp.write(b"0000000000 65535 f \n")
+        for obj_id in range(1, size):
+            self.fp.write(f"{self._offsets[obj_id]:010d} 00000 n \n".encode())
+        self.fp.write(
+            f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+
+
+class BadgeRenderer:
+    """Prepara una vez la plantilla, las fuentes y la rejilla, y compone páginas.
+
+    Trabaja en píxeles a `dpi` y convierte a puntos PDF al escribir cada página.
+    """
+
+    def __init__(self, pdf: PdfStream, context: PassContext, per_page: int = 4, dpi: int = 150):
+        from PIL import Image, ImageColor
+
+        if per_page not in GRIDS:
+            raise ValueError(f"badges por página debe ser uno de {sorted(GRIDS)}")
+
+        self.pdf = pdf
+        self.context = context
+        self.dpi = dpi
+        self.scale = 72 / dpi
+        self.cols, self.rows = GRIDS[per_page]
+        page_w, page_h = self._mm(PAGE_SIZE_MM[0]), self._mm(PAGE_SIZE_MM[1])
+        self.page_h = page_h
+
+        margin, gap = self._mm(PAGE_MARGIN_MM), self._mm(BADGE_GAP_MM)
+        self.cell_w = (page_w - 2 * margin - (self.cols - 1) * gap) // self.cols
+        self.cell_h = (page_h - 2 * margin - (self.rows - 1) * gap) // self.rows
+        self.cells = [
+            (margin + col * (self.cell_w + gap), margin + row * (self.cell_h + gap))
+            for row in range(self.rows)
+            for col in range(self.cols)
+        ]
+
+        self.fg = ImageColor.getrgb(PASSKIT_STYLE["FG_COLOR"])
+        self.bg = ImageColor.getrgb(PASSKIT_STYLE["BG_COLOR"])
+        self.label = ImageColor.getrgb(PASSKIT_STYLE["LABEL_COLOR"])
+
+        pad = self.pad = self.cell_w // 16
+        self._set_fonts(self.cell_w / 22)
+
+        # Plantilla del badge: fondo, logo y strip
+        template = Image.new("RGB", (self.cell_w, self.cell_h), self.bg)
+        logo_h = max(int(self.cell_h * 0.08), self.label_line + self.value_line)
+        logo = self._context_image(context, "logo@2x.png") or self._context_image(
+            context, "icon@2x.png"
+        )
+        if logo is not None:
+            logo.thumbnail((self.cell_w // 2, logo_h), Image.Resampling.LANCZOS)
+            template.paste(logo, (pad, pad + (logo_h - logo.height) // 2), logo)
+        self.header_box = (self.cell_w // 2, pad, self.cell_w - pad, pad + logo_h)
+        y = pad + logo_h + pad // 2
+
+        strip = self._context_image(context, "strip@2x.png")
+        if strip is not None:
+            strip_h = int(self.cell_w * strip.height / strip.width)
+            strip = strip.resize((self.cell_w, strip_h), Image.Resampling.LANCZOS)
+            # En rejillas densas se recorta el strip por el centro
+            max_h = int(self.cell_h * 0.22)
+            if strip_h > max_h:
+                top = (strip_h - max_h) // 2
+                strip = strip.crop((0, top, self.cell_w, top + max_h))
+            template.paste(strip, (0, y), strip)
+            y += strip.height
+        fields_top = y + pad // 2
+
+        # Zona de campos + QR: debajo si cabe un QR razonable, si no a la derecha
+        inner_w = self.cell_w - 2 * pad
+        reserved = 3 * self.label_line + self.name_line + 2 * self.value_line
+        qr_below = self.cell_h - pad - fields_top - reserved - pad // 2
+        if min(qr_below, int(inner_w * 0.7)) >= self._mm(22):
+            self.qr_side = min(qr_below, int(inner_w * 0.7))
+            self.qr_pos = ((self.cell_w - self.qr_side) // 2, self.cell_h - pad - self.qr_side)
+            self.fields_box = (0, fields_top, self.cell_w, self.qr_pos[1] - pad // 2)
+        else:
+            self.qr_side = min(self.cell_h - pad - fields_top, int(inner_w * 0.4))
+            self.qr_pos = (self.cell_w - pad - self.qr_side, self.cell_h - pad - self.qr_side)
+            self.fields_box = (0, fields_top, self.qr_pos[0], self.cell_h - pad)
+            # Rejillas densas: reducir el texto para que quepan todas las filas
+            available = self.fields_box[3] - fields_top
+            if reserved > available:
+                self._set_fonts(self.cell_w / 22 * available / reserved)
+
+        self.template_id = pdf.add_image(template)
+        self._headers: dict[tuple, int] = {}
+        self._stamps: dict[tuple, tuple] = {}
+        self._advances: dict[int, dict[str, float]] = {}
+
+    def _set_fonts(self, base: float):
+        self.font_label = self._load_font(max(8, int(base * 0.7)))
+        self.font_value = self._load_font(max(10, int(base * 0.95)))
+        self.font_name = self._load_font(max(12, int(base * 1.4)))
+        self.label_line = int(self.font_label.size * 1.25)
+        self.value_line = int(self.font_value.size * 1.4)
+        self.name_line = int(self.font_name.size * 1.4)
+
+    @staticmethod
+    def _load_font(size: int):
+        from PIL import ImageFont
+
+        for name in BADGE_FONTS:
+            try:
+                return ImageFont.truetype(name, size)
+            except OSError:
+                continue
+        return ImageFont.load_default(size=size)
+
+    def _mm(self, mm: float) -> int:
+        return int(round(mm / 25.4 * self.dpi))
+
+    @staticmethod
+    def _context_image(context: PassContext, name: str):
+        from PIL import Image
+
+        data = context.files.get(name)
+        if data is None:
+            return None
+        return Image.open(io.BytesIO(data)).convert("RGBA")
+
+    def _fit(self, text: str, font, width: int) -> str:
+        """Recorta `text` con "…" para que quepa en `width` píxeles.
+
+        Suma avances de carácter cacheados por fuente en lugar de medir la
+        cadena completa en cada intento.
+        """
+        advances = self._advances.setdefault(font.size, {})
+
+        def advance(ch: str) -> float:
+            if ch not in advances:
+                advances[ch] = font.getlength(ch)
+            return advances[ch]
+
+        ellipsis = advance("…")
+        total = 0.0
+        cut = None
+        for i, ch in enumerate(text):
+            w = advance(ch)
+            if cut is None and total + w + ellipsis > width:
+                cut = i
+            total += w
+            if total > width:
+                return text[:cut] + "…"
+        return text
+
+    def _text(self, img, xy: tuple[int, int], text: str, font, fill, anchor: str = "la"):
+        """Dibuja texto reutilizando el sello ya rasterizado de textos repetidos."""
+        from PIL import Image, ImageDraw
+
+        key = (text, font.size, fill, anchor)
+        stamp = self._stamps.get(key)
+        if stamp is None:
+            left, top, right, bottom = font.getbbox(text, anchor=anchor)
+            mask = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)))
+            ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=fill, anchor=anchor)
+            stamp = (mask, left, top)
+            if len(self._stamps) >= 512:
+                self._stamps.clear()
+            self._stamps[key] = stamp
+        mask, left, top = stamp
+        img.paste(mask, (xy[0] + left, xy[1] + top), mask)
+
+    def _header_image(self, fields: dict) -> int | None:
+        """Cabecera (p. ej. la fecha); igual en casi todos los badges, se escribe una vez."""
+        from PIL import Image
+
+        header = [f for f in fields.get("header", []) if f.get("value")]
+        if not header:
+            return None
+        field = header[-1]
+        key = (field.get("label", ""), field["value"])
+        if key not in self._headers:
+            left, top, right, bottom = self.header_box
+            img = Image.new("RGB", (right - left, bottom - top), self.bg)
+            label = self._fit(key[0], self.font_label, img.width)
+            value = self._fit(key[1], self.font_value, img.width)
+            self._text(img, (img.width, 0), label, self.font_label, self.label, "ra")
+            self._text(img, (img.width, img.height), value, self.font_value, self.fg, "rd")
+            self._headers[key] = self.pdf.add_image(img)
+        return self._headers[key]
+
+    def _fields_image(self, fields: dict):
+        """Rasteriza los campos: el nombre en su propia fila, el resto de dos en dos."""
+        from PIL import Image
+
+        left, top, right, bottom = self.fields_box
+        img = Image.new("RGB", (right - left, bottom - top), self.bg)
+        width = img.width - 2 * self.pad
+
+        rows = []
+        for area in ("primary", "secondary", "auxiliary"):
+            area_fields = fields.get(area, [])
+            rows += [[f] for f in area_fields if f.get("key") == "name"]
+            others = [f for f in area_fields if f.get("key") != "name"]
+            rows += [others[i : i + 2] for i in range(0, len(others), 2)]
+
+        y = 0
+        for row in rows:
+            col_w = width // len(row)
+            big = row[0].get("key") == "name"
+            font = self.font_name if big else self.font_value
+            for col, field in enumerate(row):
+                x = self.pad + col * col_w
+                label = self._fit(field.get("label", ""), self.font_label, col_w - self.pad // 2)
+                value = self._fit(field.get("value", ""), font, col_w - self.pad // 2)
+                self._text(img, (x, y), label, self.font_label, self.label)
+                self._text(img, (x, y + self.label_line), value, font, self.fg)
+            y += self.label_line + (self.name_line if big else self.value_line)
+        return img
+
+    @staticmethod
+    def _qr_modules(payload: str) -> list[list[bool]]:
+        import qrcode
+
+        # Máscara fija: evita evaluar las 8 máscaras por cada QR
+        qr = qrcode.QRCode(border=QR_BORDER, mask_pattern=0)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        return qr.get_matrix()
+
+    def _place(self, cell: tuple[int, int], box: tuple[int, int, int, int], name: str) -> bytes:
+        """Operador PDF que pinta el XObject `name` en `box` (píxeles relativos a la celda)."""
+        left, top, right, bottom = box
+        k = self.scale
+        x = (cell[0] + left) * k
+        y = (self.page_h - cell[1] - bottom) * k
+        return f"q {(right - left) * k:.2f} 0 0 {(bottom - top) * k:.2f} {x:.2f} {y:.2f} cm /{name} Do Q\n".encode()
+
+    def render_page(self, jobs: list[PassJob]) -> int:
+        """Compone y escribe una página. Devuelve cuántos badges se han dibujado."""
+        content = bytearray(b"0.8 G 0.5 w\n")
+        xobjects = {"T": self.template_id}
+        drawn = 0
+        for job in jobs:
+            try:
+                fields = compile_fields(
+                    job.persona, job.use_acreditacion, locale_bundle(job.persona, self.context)
+                )
+                header_id = self._header_image(fields)
+                fields_img = self._fields_image(fields)
+                qr_modules = self._qr_modules(job.id_used)
+            except Exception:
+                logger.exception("Error dibujando badge para %s", job.id_used)
+                continue
+
+            cell = self.cells[drawn]
+            x, y = cell[0] * self.scale, (self.page_h - cell[1] - self.cell_h) * self.scale
+            w, h = self.cell_w * self.scale, self.cell_h * self.scale
+            content += f"{x - 0.5:.2f} {y - 0.5:.2f} {w + 1:.2f} {h + 1:.2f} re S\n".encode()
+            content += self._place(cell, (0, 0, self.cell_w, self.cell_h), "T")
+            if header_id is not None:
+                xobjects[f"H{header_id}"] = header_id
+                content += self._place(cell, self.header_box, f"H{header_id}")
+            xobjects[f"F{drawn}"] = self.pdf.add_image(fields_img)
+            content += self._place(cell, self.fields_box, f"F{drawn}")
+            xobjects[f"Q{drawn}"] = self.pdf.add_bitmap(qr_modules)
+            qx, qy = self.qr_pos
+            content += self._place(cell, (qx, qy, qx + self.qr_side, qy + self.qr_side), f"Q{drawn}")
+            drawn += 1
+
+        if drawn:
+            self.pdf.add_page(bytes(content), xobjects)
+        return drawn
+
+
+def write_badge_sheets(
+    jobs: Iterable[PassJob],
+    context: PassContext,
+    pdf_path: str | Path,
+    per_page: int = 4,
+    dpi: int = 150,
+) -> int:
+    """Genera un PDF multipágina (A4) con `per_page` badges por página.
+
+    Args:
+        jobs: Pases tipo badge a imprimir (puede ser un generador)
+        context: Contexto con logo y strip ya procesados
+        pdf_path: Fichero PDF de salida
+        per_page: Badges por página (1, 2, 4, 6 u 8)
+        dpi: Resolución de rasterizado de plantilla y textos
+
+    Returns:
+        Número de badges impresos
+    """
+    pdf_path = Path(pdf_path)
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+
+    width_pt = PAGE_SIZE_MM[0] / 25.4 * 72
+    height_pt = PAGE_SIZE_MM[1] / 25.4 * 72
+
+    total = 0
+    pages = 0
+    with open(pdf_path, "wb") as f:
+        pdf = PdfStream(f, width_pt, height_pt)
+        renderer = BadgeRenderer(pdf, context, per_page=per_page, dpi=dpi)
+        pending = []
+        for job in jobs:
+            pending.append(job)
+            if len(pending) == per_page:
+                drawn = renderer.render_page(pending)
+                total += drawn
+                pages += 1 if drawn else 0
+                pending = []
+        if pending:
+            drawn = renderer.render_page(pending)
+            total += drawn
+            pages += 1 if drawn else 0
+        pdf.close()
+
+    logger.info(f"Badges imprimibles: {total} en {pages} páginas — {pdf_path}")
+    return total
@@ -0,0 +1,255 @@
+"""Caché de pases generados, direccionada por contenido.
+
+La clave es un hash de los campos de la persona, la variante (correo o
+acreditación), la huella de configuración del `PassContext` (evento, estilo,
+campos, assets y certificado) y `CACHE_FORMAT_VERSION`. Si nada de eso
+cambia, el pase firmado que ya se generó sigue siendo válido y se devuelve tal
+cual, sin QR, firma ni ZIP.
+
+Dos niveles:
+    - Memoria: LRU limitada por bytes.
+    - Disco (opcional): un fichero por entrada en `disk_dir`, con expulsión de
+      las entradas usadas hace más tiempo cuando se supera `disk_max_bytes`.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from .generate import PassContext, PassResult, Persona
+
+logger = logging.getLogger(__name__)
+
+_DISK_SUFFIX = ".pass"
+# Subir al cambiar cómo se genera un pase (JSON, manifest, ZIP, firma, QR) o su
+# serialización: las entradas de versiones anteriores dejan de coincidir
+CACHE_FORMAT_VERSION = 1
+_RESULT_FIELDS = tuple(f.name for f in dataclasses.fields(PassResult))
+
+
+def cache_key(persona: Persona, use_acreditacion: bool, fingerprint: str) -> str:
+    """Clave de caché de un pase."""
+    payload = json.dumps(
+        [
+            CACHE_FORMAT_VERSION,
+            dataclasses.asdict(persona),
+            bool(use_acreditacion),
+            fingerprint,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def result_size(result: PassResult) -> int:
+    """Bytes que ocupa un resultado (lo que cuenta para el límite de memoria)."""
+    size = 0
+    for name in _RESULT_FIELDS:
+        value = getattr(result, name)
+        size += len(value.encode("utf-8") if isinstance(value, str) else value)
+    return size
+
+
+def _serialize(result: PassResult) -> bytes:
+    # Campos con prefijo de longitud, en el orden del dataclass
+    parts = []
+    for name in _RESULT_FIELDS:
+        value = getattr(result, name)
+        data = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+        parts.append(struct.pack(">I", len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def _deserialize(data: bytes) -> PassResult | None:
+    values = {}
+    offset = 0
+    for f in dataclasses.fields(PassResult):
+        if offset + 4 > len(data):
+            return None
+        (length,) = struct.unpack_from(">I", data, offset)
+        offset += 4
+        chunk = data[offset : offset + length]
+        if len(chunk) != length:
+            return None
+        offset += length
+        values[f.name] = chunk.decode("utf-8") if f.type in (str, "str") else chunk
+    if offset != len(data):
+        # Formato de otra versión de PassResult
+        return None
+    return PassResult(**values)
+
+
+class PassCache:
+    """Caché LRU de `PassResult` en memoria, con nivel opcional en disco.
+
+    Es segura entre hilos. Las métricas (`hits`, `disk_hits`, `misses`,
+    `evictions`) se pueden consultar con `stats()`.
+
+    Args:
+        max_bytes: Límite del nivel en memoria
+        disk_dir: Directorio del nivel en disco (None lo desactiva)
+        disk_max_bytes: Límite del nivel en disco
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: str | Path | None = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[PassResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self._disk_files())
+
+    def key_for(self, persona: Persona, use_acreditacion: bool, context: PassContext) -> str:
+        return cache_key(persona, use_acreditacion, context.fingerprint)
+
+    def get(self, key: str) -> PassResult | None:
+        """Devuelve el pase guardado o None. Un acierto en disco sube a memoria."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        result = self._disk_get(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, result)
+        return result
+
+    def put(self, key: str, result: PassResult):
+        with self._lock:
+            self._memory_put(key, result)
+        self._disk_put(key, result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # --- Memoria -----------------------------------------------------------
+
+    def _memory_put(self, key: str, result: PassResult):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (result, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    # --- Disco -------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}{_DISK_SUFFIX}"
+
+    def _disk_files(self) -> list[Path]:
+        return list(self.disk_dir.glob(f"*{_DISK_SUFFIX}"))
+
+    def _disk_get(self, key: str) -> PassResult | None:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"No se pudo leer la caché {path.name}: {e}")
+            return None
+        result = _deserialize(data)
+        if result is None:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            # La fecha de modificación marca el último uso para la expulsión
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def _disk_put(self, key: str, result: PassResult):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        data = _serialize(result)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"No se pudo escribir la caché {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._disk_bytes += len(data) - previous
+            if self._disk_bytes > self.disk_max_bytes:
+                self._disk_evict()
+
+    def _disk_evict(self):
+        # Se baja al 90% del límite para no expulsar en cada escritura
+        target = self.disk_max_bytes * 0.9
+        files = []
+        for path in self._disk_files():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
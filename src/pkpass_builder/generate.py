@@ -10,9 +10,11 @@ import os
 import subprocess
 import tempfile
 import io
+import hashlib
 import logging
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from datetime import datetime
 
 # Cargar variables de entorno desde .env
@@ -134,6 +136,79 @@ PASSKIT_FIELDS = {
     ],
 }
 
+# --- Localization ---
+# Catálogos por idioma: meses, formato de fecha y traducciones. Las claves de
+# "STRINGS" son los textos originales (en español) de PASSKIT_FIELDS, PASSKIT_EVENT
+# y los roles; lo que no tenga traducción se deja tal cual.
+PASSKIT_LOCALES = {
+    "es": {
+        "MESES": "ene feb mar abr may jun jul ago sept oct nov dic".split(),
+        "FECHA": "{dia:02d} {mes}, {anio}",
+        "STRINGS": {},
+    },
+    "en": {
+        "MESES": "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(),
+        "FECHA": "{mes} {dia:02d}, {anio}",
+        "STRINGS": {
+            "Nombre": "Name",
+            "Rol": "Role",
+            "Correo": "Email",
+            "Acreditación": "Accreditation",
+            "Evento": "Event",
+            "Ubicación": "Location",
+            "Información de Entrada": "Entry Information",
+            "Presenta este pase cuando hagas el check-in.": "Show this pass when you check in.",
+            "Horario, retos y más": "Schedule, challenges and more",
+            "Términos y Condiciones": "Terms and Conditions",
+            "Política de Privacidad": "Privacy Policy",
+            "Código de Conducta": "Code of Conduct",
+            "Organizado por": "Organized by",
+            "Pase de acceso a HackUDC 2026": "HackUDC 2026 access pass",
+            "Presenta este pase en la entrada del evento.": "Show this pass at the event entrance.",
+            "Patrocinador": "Sponsor",
+            "Organización": "Organizer",
+            "Voluntariado": "Volunteer",
+        },
+    },
+    "gl": {
+        "MESES": "xan feb mar abr mai xuñ xul ago set out nov dec".split(),
+        "FECHA": "{dia:02d} {mes}, {anio}",
+        "STRINGS": {
+            "Nombre": "Nome",
+            "Ubicación": "Localización",
+            "Información de Entrada": "Información de entrada",
+            "Presenta este pase cuando hagas el check-in.": "Presenta este pase cando fagas o check-in.",
+            "Horario, retos y más": "Horario, retos e máis",
+            "Términos y Condiciones": "Termos e condicións",
+            "Política de Privacidad": "Política de privacidade",
+            "Código de Conducta": "Código de conduta",
+            "Pase de acceso a HackUDC 2026": "Pase de acceso á HackUDC 2026",
+            "Presenta este pase en la entrada del evento.": "Presenta este pase na entrada do evento.",
+        },
+    },
+}
+
+# Idiomas incluidos en los pases (por defecto todos) e idioma por defecto
+_locales_env = os.getenv("PASSKIT_LOCALES")
+if _locales_env:
+    _wanted = [code.strip() for code in _locales_env.split(",") if code.strip()]
+    for _code in _wanted:
+        if _code not in PASSKIT_LOCALES:
+            logger.warning(f"Idioma sin catálogo en PASSKIT_LOCALES: {_code}")
+    _available = {code: PASSKIT_LOCALES[code] for code in _wanted if code in PASSKIT_LOCALES}
+    if not _available:
+        logger.warning("PASSKIT_LOCALES no incluye ningún idioma con catálogo; usando 'es'")
+        _available = {"es": PASSKIT_LOCALES["es"]}
+    PASSKIT_LOCALES = _available
+
+PASSKIT_DEFAULT_LOCALE = os.getenv("PASSKIT_LOCALE", "es")
+if PASSKIT_DEFAULT_LOCALE not in PASSKIT_LOCALES:
+    logger.warning(
+        f"Idioma por defecto '{PASSKIT_DEFAULT_LOCALE}' no disponible; "
+        f"usando '{next(iter(PASSKIT_LOCALES))}'"
+    )
+    PASSKIT_DEFAULT_LOCALE = next(iter(PASSKIT_LOCALES))
+
 # --- Assets & Output ---
 PASSKIT_ASSETS_DIR = str(BASE_DIR / "assets" / "img")
 OUTPUT_DIR = BASE_DIR / "output"
@@ -143,7 +218,7 @@ OUTPUT_DIR = BASE_DIR / "output"
 # ============================================================================
 
 
-@dataclass
+@dataclass(slots=True)
 class Persona:
     """Clase simple para representar una persona."""
 
@@ -155,6 +230,7 @@ class Persona:
     dni: str = ""
     mentor: bool = False
     patrocinador: bool = False
+    idioma: str = None  # p. ej. "en"; si no, PASSKIT_DEFAULT_LOCALE
 
 
 @dataclass
@@ -164,45 +240,89 @@ class PassResult:
     pkpass: bytes
     qr_png: bytes
     acreditacion: str = ""
+    # sha256 de manifest.json: cubre todo el contenido del pase salvo la firma
+    digest: str = ""
+
+
+@dataclass
+class PassContext:
+    """Estado reutilizable entre pases: imágenes procesadas y certificados PEM."""
+
+    files: dict[str, bytes]
+    cert_pem: str
+    key_pem: str
+    wwdr_pem: str
+    fingerprint: str = ""  # huella de configuración, assets y certificado
+    locales: dict[str, "LocaleBundle"] = field(default_factory=dict)
+
 
+@dataclass
+class LocaleBundle:
+    """Recursos de un idioma, calculados una vez por ejecución y compartidos por sus pases."""
+
+    locale: str
+    date_values: dict[str, str]
+    strings: dict[str, str]  # texto original -> texto en este idioma
+    files: dict[str, bytes] = field(default_factory=dict)  # imágenes y *.lproj/pass.strings
+    hashes: dict[str, str] = field(default_factory=dict)  # sha1 de `files` para el manifest
+
+    def translate(self, text: str) -> str:
+        return self.strings.get(text, text)
+
+
+@dataclass
+class PassJob:
+    """Un pase a generar: persona, variante y destino en disco."""
+
+    persona: Persona
+    use_acreditacion: bool
+    tipo: str  # "badge" o "entrada"
+    id_used: str
+    file_base: str
+
+    @property
+    def subfolder(self) -> str:
+        return "badges" if self.tipo == "badge" else "entradas"
+
+
+def resolve_locale(persona: Persona) -> str:
+    """Idioma del pase: `persona.idioma` si hay catálogo (también "en-GB" -> "en")."""
+    idioma = (persona.idioma or "").strip().replace("_", "-")
+    for candidate in (idioma, idioma.lower(), idioma.split("-")[0].lower()):
+        if candidate in PASSKIT_LOCALES:
+            return candidate
+    return PASSKIT_DEFAULT_LOCALE
+
+
+def format_event_date(locale: str) -> dict[str, str]:
+    """Hora y fecha corta del evento en el idioma dado."""
+    date = PASSKIT_EVENT.get("DATE")
+    if not date:
+        return {"hora": "", "fecha_corta": ""}
+    catalog = PASSKIT_LOCALES.get(locale) or PASSKIT_LOCALES[PASSKIT_DEFAULT_LOCALE]
+    return {
+        "hora": date.strftime("%H:%M"),
+        "fecha_corta": catalog["FECHA"].format(
+            dia=date.day, mes=catalog["MESES"][date.month - 1], anio=date.year
+        ),
+    }
 
-def build_substitution_context(persona: Persona) -> dict:
+
+def build_substitution_context(persona: Persona, bundle: LocaleBundle | None = None) -> dict:
     """Construye el diccionario de sustituciones para los campos del pase."""
+    if bundle is None:
+        bundle = build_locale_bundle(resolve_locale(persona))
     role = persona.rol if persona.rol else "Hacker"
 
-    # Formatear fecha del evento
-    date_values = {"hora": "", "fecha_corta": ""}
-    if PASSKIT_EVENT.get("DATE"):
-        date = PASSKIT_EVENT["DATE"]
-        meses_abrev = [
-            "",
-            "ene",
-            "feb",
-            "mar",
-            "abr",
-            "may",
-            "jun",
-            "jul",
-            "ago",
-            "sept",
-            "oct",
-            "nov",
-            "dic",
-        ]
-        date_values = {
-            "hora": date.strftime("%H:%M"),
-            "fecha_corta": f"{date.day:02d} {meses_abrev[date.month]}, {date.year}",
-        }
-
     return {
         "{nombre}": persona.nombre,
         "{correo}": persona.correo,
         "{acreditacion}": persona.acreditacion or "",
         "{token}": persona.token or "",
         "{dni}": persona.dni or "",
-        "{rol}": role,
-        "{hora}": date_values["hora"],
-        "{fecha_corta}": date_values["fecha_corta"],
+        "{rol}": bundle.translate(role),
+        "{hora}": bundle.date_values["hora"],
+        "{fecha_corta}": bundle.date_values["fecha_corta"],
     }
 
 
@@ -222,24 +342,59 @@ def process_fields(fields_list: list, context: dict, area: str = "") -> list:
     return processed
 
 
-def cargar_personas(json_file: str) -> list[Persona]:
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    personas = []
-    for item in data:
-        personas.append(
-            Persona(
-                correo=item.get("correo"),
-                nombre=item.get("nombre"),
-                acreditacion=item.get("acreditacion"),
-                token=item.get("token"),
-                rol=item.get("rol", "Hacker"),
-                dni=item.get("dni", ""),
-                mentor=item.get("mentor", False),
-                patrocinador=item.get("patrocinador", False),
-            )
-        )
-    return personas
+def compile_fields(
+    persona: Persona, use_acreditacion: bool = False, bundle: LocaleBundle | None = None
+) -> dict[str, list]:
+    """Devuelve los campos de `PASSKIT_FIELDS` ya sustituidos para una persona, por área.
+
+    Si se usa acreditación, se inyecta el campo 'acreditacion' en `auxiliary`.
+    Etiquetas y textos fijos se traducen al idioma de `bundle` (por defecto, el
+    de la persona).
+    """
+    from copy import deepcopy
+
+    fields_to_use = deepcopy(PASSKIT_FIELDS)
+    if use_acreditacion and persona.acreditacion:
+        aux = fields_to_use.get("auxiliary", [])
+        if not any(f.get("key") == "acreditacion" for f in aux):
+            aux.append({"key": "acreditacion", "label": "Acreditación", "value": "{acreditacion}"})
+            fields_to_use["auxiliary"] = aux
+
+    if bundle is None:
+        bundle = build_locale_bundle(resolve_locale(persona))
+    for campos_config in fields_to_use.values():
+        for campo in campos_config:
+            for key in ("label", "value"):
+                if isinstance(campo.get(key), str):
+                    campo[key] = bundle.translate(campo[key])
+
+    substitutions = build_substitution_context(persona, bundle)
+    return {
+        area: process_fields(campos_config, substitutions, area)
+        for area, campos_config in fields_to_use.items()
+    }
+
+
+def persona_from_dict(item: dict) -> Persona:
+    """Construye una Persona a partir de un registro del JSON de entrada."""
+    return Persona(
+        correo=item.get("correo"),
+        nombre=item.get("nombre"),
+        acreditacion=item.get("acreditacion"),
+        token=item.get("token"),
+        rol=item.get("rol", "Hacker"),
+        dni=item.get("dni", ""),
+        mentor=item.get("mentor", False),
+        patrocinador=item.get("patrocinador", False),
+        idioma=item.get("idioma"),
+    )
+
+
+def cargar_personas(json_file: str):
+    """Carga el JSON de personas en una `PersonaTable` (secuencia compacta de `Persona`)."""
+    from .personas import PersonaTable
+
+    return PersonaTable.from_json(json_file)
 
 
 def should_process_persona(persona: Persona, use_acreditacion: bool) -> bool:
@@ -557,7 +712,185 @@ def generate_pass_assets(tmp_dir: Path):
         _save_strip(strip_path, tmp_dir)
 
 
-def generate_pass(persona: Persona, use_acreditacion: bool = False) -> PassResult:
+def prepare_pass_context(tmp_dir: Path) -> PassContext:
+    """Genera los assets y extrae los certificados una sola vez por ejecución.
+
+    Args:
+        tmp_dir: Directorio temporal donde quedan los PEM; debe existir mientras
+            se use el contexto
+
+    Returns:
+        PassContext listo para reutilizar en `generate_pass`
+
+    Raises:
+        FileNotFoundError, RuntimeError: Si hay error de certificados
+    """
+    generate_pass_assets(tmp_dir)
+    files = {img_file.name: img_file.read_bytes() for img_file in tmp_dir.glob("*.png")}
+
+    cert_pem, key_pem = extract_p12_certificates(
+        PASSKIT_AUTH["P12_PATH"], PASSKIT_AUTH["P12_PASSWORD"], tmp_dir
+    )
+    wwdr_pem = ensure_wwdr_pem(PASSKIT_AUTH["WWDR_CERT"], tmp_dir)
+
+    return PassContext(
+        files=files,
+        cert_pem=cert_pem,
+        key_pem=key_pem,
+        wwdr_pem=wwdr_pem,
+        fingerprint=config_fingerprint(files, cert_pem),
+        locales={locale: build_locale_bundle(locale, files) for locale in PASSKIT_LOCALES},
+    )
+
+
+def encode_pass_strings(strings: dict[str, str]) -> bytes:
+    """Serializa un `pass.strings` (formato .strings de Apple, UTF-16 con BOM)."""
+
+    def quote(text: str) -> str:
+        text = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return f'"{text}"'
+
+    lines = [f"{quote(key)} = {quote(value)};\n" for key, value in strings.items()]
+    return "".join(lines).encode("utf-16")
+
+
+def build_locale_bundle(locale: str, files: dict[str, bytes] | None = None) -> LocaleBundle:
+    """Prepara los recursos de los pases cuyo idioma base es `locale`.
+
+    Los textos de `pass.json` quedan en `locale`; cada `<idioma>.lproj/pass.strings`
+    traduce esos textos a su idioma para que Wallet muestre el del dispositivo.
+    Con un solo idioma configurado no se añaden `.lproj`.
+    """
+    catalog = PASSKIT_LOCALES.get(locale, {}).get("STRINGS", {})
+    date_values = format_event_date(locale)
+    bundle = LocaleBundle(locale=locale, date_values=date_values, strings=dict(catalog))
+    if files is None:
+        return bundle
+
+    bundle.files = dict(files)
+    if len(PASSKIT_LOCALES) > 1:
+        sources = {text for other in PASSKIT_LOCALES.values() for text in other["STRINGS"]}
+        for target, target_catalog in PASSKIT_LOCALES.items():
+            translations = {}
+            for text in sorted(sources):
+                base_text = catalog.get(text, text)
+                target_text = target_catalog["STRINGS"].get(text, text)
+                if base_text != target_text:
+                    translations[base_text] = target_text
+            target_date = format_event_date(target)["fecha_corta"]
+            if date_values["fecha_corta"] != target_date:
+                translations[date_values["fecha_corta"]] = target_date
+            bundle.files[f"{target}.lproj/pass.strings"] = encode_pass_strings(translations)
+
+    bundle.hashes = {name: hashlib.sha1(data).hexdigest() for name, data in bundle.files.items()}
+    return bundle
+
+
+def locale_bundle(persona: Persona, context: PassContext) -> LocaleBundle:
+    """Recursos del idioma de una persona (los del contexto si están preparados)."""
+    locale = resolve_locale(persona)
+    bundle = context.locales.get(locale)
+    if bundle is None:
+        bundle = build_locale_bundle(locale, context.files)
+        context.locales[locale] = bundle
+    return bundle
+
+
+# Fecha fija de las entradas del ZIP (la mínima del formato) para que la salida sea reproducible
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+
+@lru_cache(maxsize=None)
+def _pass_class():
+    """Subclase de `wallet.models.Pass` con salida reproducible.
+
+    - Reutiliza los hashes precalculados de los ficheros compartidos.
+    - `pass.json` y `manifest.json` con claves ordenadas y formato compacto.
+    - ZIP con entradas ordenadas, fecha fija y atributos fijos.
+
+    Con la misma entrada, todo el `.pkpass` sale idéntico salvo `signature`
+    (la firma PKCS#7 incluye la hora de firma).
+    """
+    import zipfile
+
+    from wallet.models import Pass, PassHandler
+
+    class BuilderPass(Pass):
+        shared_hashes: dict[str, str] = {}
+        manifest: bytes = b""
+
+        def _createPassJson(self):
+            return json.dumps(
+                self, default=PassHandler, sort_keys=True, separators=(",", ":")
+            ).encode("utf-8")
+
+        def _createManifest(self, pass_json):
+            self._hashes = {"pass.json": hashlib.sha1(pass_json).hexdigest()}
+            for filename, filedata in self._files.items():
+                digest = self.shared_hashes.get(filename)
+                self._hashes[filename] = digest or hashlib.sha1(filedata).hexdigest()
+            self.manifest = json.dumps(
+                self._hashes, sort_keys=True, separators=(",", ":")
+            ).encode("utf-8")
+            return self.manifest
+
+        def _createZip(self, pass_json, manifest, signature, zip_file=None):
+            entries = {
+                "signature": signature,
+                "manifest.json": manifest,
+                "pass.json": pass_json,
+                **self._files,
+            }
+            with zipfile.ZipFile(zip_file or "pass.pkpass", "w") as zf:
+                for name in sorted(entries):
+                    info = zipfile.ZipInfo(name, date_time=ZIP_TIMESTAMP)
+                    info.create_system = 3
+                    info.external_attr = 0o644 << 16
+                    zf.writestr(info, entries[name])
+
+    return BuilderPass
+
+
+def pkpass_digest(pkpass: str | Path | bytes) -> str:
+    """Digest del contenido sin firmar de un `.pkpass` ya generado (ver `PassResult.digest`)."""
+    import zipfile
+
+    source = io.BytesIO(pkpass) if isinstance(pkpass, bytes) else pkpass
+    with zipfile.ZipFile(source) as zf:
+        return hashlib.sha256(zf.read("manifest.json")).hexdigest()
+
+
+def certificate_der(cert_pem: str | Path) -> bytes:
+    """Primer certificado de un PEM en DER (tal como va incrustado en `signature`)."""
+    import base64
+
+    text = Path(cert_pem).read_text()
+    begin = text.index("-----BEGIN CERTIFICATE-----") + len("-----BEGIN CERTIFICATE-----")
+    end = text.index("-----END CERTIFICATE-----", begin)
+    return base64.b64decode("".join(text[begin:end].split()))
+
+
+def config_fingerprint(files: dict[str, bytes], cert_pem: str) -> str:
+    """Huella de todo lo que, además de la persona, determina el contenido de un pase."""
+    config = {
+        "auth": {k: PASSKIT_AUTH[k] for k in ("TEAM_ID", "PASS_TYPE_ID")},
+        "event": PASSKIT_EVENT,
+        "style": PASSKIT_STYLE,
+        "fields": PASSKIT_FIELDS,
+        "locales": [PASSKIT_LOCALES, PASSKIT_DEFAULT_LOCALE],
+        "files": {name: hashlib.sha256(data).hexdigest() for name, data in files.items()},
+        "cert": hashlib.sha256(Path(cert_pem).read_bytes()).hexdigest(),
+    }
+    encoded = json.dumps(config, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def generate_pass(
+    persona: Persona,
+    use_acreditacion: bool = False,
+    context: PassContext | None = None,
+    cache=None,
+) -> PassResult:
     """Genera el archivo .pkpass y el QR para una Persona.
 
     Args:
@@ -565,15 +898,21 @@ def generate_pass(persona: Persona, use_acreditacion: bool = False) -> PassResul
         use_acreditacion: Si es True, usa `persona.acreditacion` como identificador
             (serialNumber, barcode, QR y nombre de fichero). Si no existe,
             cae al `correo`.
+        context: Contexto preparado con `prepare_pass_context`. Si no se pasa,
+            se prepara uno temporal solo para este pase.
+        cache: `PassCache` opcional; si ya contiene el pase se devuelve sin regenerar
 
     Returns:
-        PassResult con pkpass (bytes), qr_png (bytes) y acreditacion (str)
+        PassResult con pkpass (bytes), qr_png (bytes), acreditacion (str) y
+        digest (str, idéntico entre generaciones del mismo pase)
 
     Raises:
         RuntimeError: Si wallet no está instalado o hay error de certificados
     """
     try:
-        from wallet.models import Pass, Barcode, BarcodeFormat, EventTicket
+        from wallet.models import Barcode, BarcodeFormat, EventTicket
+
+        Pass = _pass_class()
     except ImportError:
         raise RuntimeError(
             "La librería 'wallet-py3k' no está instalada. Instala con: pip install wallet-py3k"
@@ -587,91 +926,173 @@ def generate_pass(persona: Persona, use_acreditacion: bool = False) -> PassResul
     # Identificador que se usará para QR, serialNumber y nombre de fichero
     id_value = persona.acreditacion if (use_acreditacion and persona.acreditacion) else persona.correo
 
-    with tempfile.TemporaryDirectory() as tmp_str:
-        tmp_dir = Path(tmp_str)
-
-        # Generar assets (icono, logo, strip)
-        generate_pass_assets(tmp_dir)
-
-        # Generar QR (usa id_value en lugar de correo cuando corresponda)
-        qr_buffer = io.BytesIO()
-        qrcode.make(id_value).save(qr_buffer, format="PNG")
-        qr_bytes = qr_buffer.getvalue()
-
-        # Construir el pase
-        ticket = EventTicket()
-        context = build_substitution_context(persona)
-
-        # Preparar campos (posible inyección del campo 'acreditacion' cuando se use acreditación)
-        from copy import deepcopy
-
-        fields_to_use = deepcopy(PASSKIT_FIELDS)
-        if use_acreditacion and persona.acreditacion:
-            aux = fields_to_use.get("auxiliary", [])
-            if not any(f.get("key") == "acreditacion" for f in aux):
-                aux.append({"key": "acreditacion", "label": "Acreditación", "value": "{acreditacion}"})
-                fields_to_use["auxiliary"] = aux
-
-        # Añadir campos procesados
-        for area, campos_config in fields_to_use.items():
-            method_name = f"add{area.capitalize()}Field"
-            if hasattr(ticket, method_name):
-                method = getattr(ticket, method_name)
-                processed = process_fields(campos_config, context, area)
-                if (
-                    area == "primary"
-                    and not processed
-                    and not PASSKIT_STYLE.get("STRIP")
-                ):
-                    method("placeholder", "", "")
-                for field in processed:
-                    method(field["key"], field["value"], field["label"])
-        # Configuración del pase
-        pass_obj = Pass(
-            ticket,
-            passTypeIdentifier=PASSKIT_AUTH["PASS_TYPE_ID"],
-            organizationName=PASSKIT_EVENT["ORG"],
-            teamIdentifier=PASSKIT_AUTH["TEAM_ID"],
-        )
+    if context is None:
+        with tempfile.TemporaryDirectory() as tmp_str:
+            context = prepare_pass_context(Path(tmp_str))
+            return generate_pass(persona, use_acreditacion, context, cache)
+
+    if cache is not None:
+        key = cache.key_for(persona, use_acreditacion, context)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = generate_pass(persona, use_acreditacion, context)
+        cache.put(key, result)
+        return result
+
+    # Generar QR (usa id_value en lugar de correo cuando corresponda)
+    qr_buffer = io.BytesIO()
+    qrcode.make(id_value).save(qr_buffer, format="PNG")
+    qr_bytes = qr_buffer.getvalue()
+
+    # Construir el pase
+    ticket = EventTicket()
+
+    bundle = locale_bundle(persona, context)
+
+    # Añadir campos procesados
+    for area, processed in compile_fields(persona, use_acreditacion, bundle).items():
+        method_name = f"add{area.capitalize()}Field"
+        if hasattr(ticket, method_name):
+            method = getattr(ticket, method_name)
+            if (
+                area == "primary"
+                and not processed
+                and not PASSKIT_STYLE.get("STRIP")
+            ):
+                method("placeholder", "", "")
+            for field in processed:
+                method(field["key"], field["value"], field["label"])
+    # Configuración del pase
+    pass_obj = Pass(
+        ticket,
+        passTypeIdentifier=PASSKIT_AUTH["PASS_TYPE_ID"],
+        organizationName=PASSKIT_EVENT["ORG"],
+        teamIdentifier=PASSKIT_AUTH["TEAM_ID"],
+    )
+
+    # usar id_value como serial y código de barras
+    pass_obj.serialNumber = id_value
+    pass_obj.description = bundle.translate(PASSKIT_EVENT["DESC"])
+    pass_obj.foregroundColor = PASSKIT_STYLE["FG_COLOR"]
+    pass_obj.backgroundColor = PASSKIT_STYLE["BG_COLOR"]
+    pass_obj.labelColor = PASSKIT_STYLE["LABEL_COLOR"]
+    pass_obj.barcode = Barcode(message=id_value, format=BarcodeFormat.QR)
+
+    # Fecha y localización para que aparezca en pantalla de inicio
+    if PASSKIT_EVENT.get("DATE"):
+        from datetime import timezone, timedelta
+
+        tz = timezone(timedelta(hours=1))
+        date_with_tz = PASSKIT_EVENT["DATE"].replace(tzinfo=tz)
+        pass_obj.relevantDate = date_with_tz.isoformat()
+
+    if PASSKIT_EVENT.get("LOCATION"):
+        location = dict(PASSKIT_EVENT["LOCATION"])
+        if location.get("relevantText"):
+            location["relevantText"] = bundle.translate(location["relevantText"])
+        pass_obj.locations = [location]
+
+    # Imágenes y .lproj del idioma: mismos bytes y hashes para todos sus pases
+    pass_obj._files.update(bundle.files)
+    pass_obj.shared_hashes = bundle.hashes
+
+    # Firmar el pase
+    pkpass_buffer = io.BytesIO()
+    pass_obj.create(
+        context.cert_pem, context.key_pem, context.wwdr_pem, "", zip_file=pkpass_buffer
+    )
+    pkpass_bytes = pkpass_buffer.getvalue()
+
+    if len(pkpass_bytes) == 0:
+        raise RuntimeError("El archivo .pkpass generado está vacío")
+
+    return PassResult(
+        pkpass=pkpass_bytes,
+        qr_png=qr_bytes,
+        acreditacion=acreditacion,
+        digest=hashlib.sha256(pass_obj.manifest).hexdigest(),
+    )
+
+
+def _file_base(persona: Persona, id_used: str, both_mode: bool) -> str:
+    """Nombre base del fichero: `token` si existe, si no el identificador (sanitizado)."""
+    if both_mode:
+        file_base = str(persona.token) if persona.token else str(id_used)
+        return file_base.replace("@", "_").replace(".", "_").replace("/", "_").replace(" ", "_")
+
+    # Modo exclusivo: se mantiene el saneado histórico de cada caso
+    if persona.token:
+        return str(persona.token).replace("@", "_").replace("/", "_").replace(" ", "_")
+    return str(id_used).replace("@", "_").replace(".", "_").replace(" ", "_")
 
-        # usar id_value como serial y código de barras
-        pass_obj.serialNumber = id_value
-        pass_obj.description = PASSKIT_EVENT["DESC"]
-        pass_obj.foregroundColor = PASSKIT_STYLE["FG_COLOR"]
-        pass_obj.backgroundColor = PASSKIT_STYLE["BG_COLOR"]
-        pass_obj.labelColor = PASSKIT_STYLE["LABEL_COLOR"]
-        pass_obj.barcode = Barcode(message=id_value, format=BarcodeFormat.QR)
-
-        # Fecha y localización para que aparezca en pantalla de inicio
-        if PASSKIT_EVENT.get("DATE"):
-            from datetime import timezone, timedelta
-
-            tz = timezone(timedelta(hours=1))
-            date_with_tz = PASSKIT_EVENT["DATE"].replace(tzinfo=tz)
-            pass_obj.relevantDate = date_with_tz.isoformat()
-
-        if PASSKIT_EVENT.get("LOCATION"):
-            pass_obj.locations = [PASSKIT_EVENT["LOCATION"]]
-
-        # Añadir imágenes
-        for img_file in tmp_dir.glob("*.png"):
-            with open(img_file, "rb") as f:
-                pass_obj.addFile(img_file.name, f)
-
-        # Firmar el pase
-        cert_pem, key_pem = extract_p12_certificates(
-            PASSKIT_AUTH["P12_PATH"], PASSKIT_AUTH["P12_PASSWORD"], tmp_dir
+
+def plan_jobs(persona: Persona, use_acreditacion: bool, both_mode: bool) -> list[PassJob]:
+    """Calcula los pases que hay que generar para una persona según el modo.
+
+    - Modo BOTH: badge (si tiene acreditación) y entrada (siempre).
+    - Modo exclusivo: un único pase, o ninguno si `should_process_persona` lo descarta.
+    """
+    jobs = []
+    if both_mode:
+        if persona.acreditacion:
+            jobs.append(
+                PassJob(
+                    persona=persona,
+                    use_acreditacion=True,
+                    tipo="badge",
+                    id_used=persona.acreditacion,
+                    file_base=_file_base(persona, persona.acreditacion, True),
+                )
+            )
+        jobs.append(
+            PassJob(
+                persona=persona,
+                use_acreditacion=False,
+                tipo="entrada",
+                id_used=persona.correo,
+                file_base=_file_base(persona, persona.correo, True),
+            )
         )
-        wwdr_pem = ensure_wwdr_pem(PASSKIT_AUTH["WWDR_CERT"], tmp_dir)
+        return jobs
+
+    if not should_process_persona(persona, use_acreditacion):
+        return jobs
+
+    id_used = persona.acreditacion if (use_acreditacion and persona.acreditacion) else persona.correo
+    jobs.append(
+        PassJob(
+            persona=persona,
+            use_acreditacion=use_acreditacion,
+            tipo="badge" if use_acreditacion else "entrada",
+            id_used=id_used,
+            file_base=_file_base(persona, id_used, False),
+        )
+    )
+    return jobs
 
-        pkpass_buffer = io.BytesIO()
-        pass_obj.create(cert_pem, key_pem, wwdr_pem, "", zip_file=pkpass_buffer)
-        pkpass_bytes = pkpass_buffer.getvalue()
 
-        if len(pkpass_bytes) == 0:
-            raise RuntimeError("El archivo .pkpass generado está vacío")
+def prepare_output_dirs(output_dir: Path):
+    """Crea las subcarpetas separadas para entradas (email) y badges (acreditación)."""
+    for kind in ("qr", "pass"):
+        for subfolder in ("entradas", "badges"):
+            (output_dir / kind / subfolder).mkdir(parents=True, exist_ok=True)
 
-    return PassResult(pkpass=pkpass_bytes, qr_png=qr_bytes, acreditacion=acreditacion)
+
+def write_pass_result(output_dir: Path, job: PassJob, result: PassResult, writer=None) -> Path:
+    """Guarda el .pkpass y el QR de un pase en su subcarpeta. Devuelve la ruta del .pkpass.
+
+    Si se pasa un `PassWriter`, la escritura se encola y se hace en segundo plano.
+    """
+    pkpass_path = output_dir / "pass" / job.subfolder / f"{job.file_base}.pkpass"
+    qr_path = output_dir / "qr" / job.subfolder / f"{job.file_base}.png"
+    if writer is not None:
+        writer.submit(pkpass_path, result.pkpass, digest=result.digest)
+        writer.submit(qr_path, result.qr_png)
+    else:
+        pkpass_path.write_bytes(result.pkpass)
+        qr_path.write_bytes(result.qr_png)
+    return pkpass_path
 
 
 def main():
@@ -701,7 +1122,65 @@ def main():
         help="Generar BOTH: entradas (email) y badges (acreditación) en la misma ejecución",
     )
 
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=str(OUTPUT_DIR),
+        help="Directorio de salida (por defecto: output/ en la raíz del proyecto)",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="No reescribir QR sin cambios ni pases cuyo contenido sin firmar y certificado "
+        "de firma no han cambiado",
+    )
+    parser.add_argument(
+        "--no-fsync",
+        action="store_true",
+        help="No forzar la escritura a disco tras cada lote (más rápido, menos seguro)",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Mantener el proceso vivo y regenerar solo los registros nuevos o modificados "
+        "(json_file puede ser un fichero o un directorio de JSON)",
+    )
+    parser.add_argument(
+        "-p",
+        "--print-badges",
+        action="store_true",
+        help="Generar además un PDF imprimible con los badges (personas con acreditación)",
+    )
+    parser.add_argument(
+        "--badges-per-page",
+        type=int,
+        choices=[1, 2, 4, 6, 8],
+        default=4,
+        help="Badges por página A4 en el PDF imprimible (por defecto: 4)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Guardar los pases generados en este directorio y reutilizarlos en ejecuciones "
+        "posteriores si la persona y la configuración no han cambiado",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=1024,
+        help="Tamaño máximo de la caché en disco en MB (por defecto: 1024)",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.2,
+        help="Segundos entre comprobaciones en modo --watch (por defecto: 0.2)",
+    )
+
     args = parser.parse_args()
+    if args.watch and args.print_badges:
+        # El PDF se genera al terminar una ejecución completa; en modo watch no termina
+        parser.error("--print-badges no se puede usar con --watch")
 
     json_file = args.json_file
     use_acreditacion = args.use_acreditacion
@@ -720,112 +1199,125 @@ def main():
 
     logger.info("Certificados verificados")
 
-    logger.info(f"Cargando personas desde {json_file}...")
-    personas = cargar_personas(json_file)
-    logger.info(f"Cargadas {len(personas)} personas")
-
-    output_dir = Path(OUTPUT_DIR)
-    output_dir.mkdir(exist_ok=True)
-
-    # Crear subcarpetas separadas para entradas (email) y badges (acreditación)
-    (output_dir / "qr").mkdir(exist_ok=True)
-    (output_dir / "qr" / "entradas").mkdir(exist_ok=True)
-    (output_dir / "qr" / "badges").mkdir(exist_ok=True)
+    output_dir = Path(args.output_dir)
+    prepare_output_dirs(output_dir)
 
-    (output_dir / "pass").mkdir(exist_ok=True)
-    (output_dir / "pass" / "entradas").mkdir(exist_ok=True)
-    (output_dir / "pass" / "badges").mkdir(exist_ok=True)
+    # Assets y certificados se preparan una sola vez y se reutilizan en todos los pases
+    with tempfile.TemporaryDirectory() as tmp_str:
+        try:
+            context = prepare_pass_context(Path(tmp_str))
+        except (FileNotFoundError, RuntimeError) as e:
+            logger.error(f"Error preparando assets y certificados: {e}")
+            sys.exit(1)
 
-    exitosos = 0
-    fallidos = 0
+        from .writer import PassWriter
 
+        from .cache import PassCache
 
+        writer = PassWriter(
+            fsync=not args.no_fsync,
+            skip_unchanged=args.skip_unchanged,
+            signer_cert=certificate_der(context.cert_pem),
+        )
+        # En modo watch la caché en memoria evita regenerar registros que vuelven a un estado previo
+        cache = None
+        if args.cache_dir or args.watch:
+            cache = PassCache(
+                disk_dir=args.cache_dir, disk_max_bytes=args.cache_max_mb * 1024 * 1024
+            )
 
+        if args.watch:
+            from .watch import Watcher
+
+            with writer:
+                Watcher(
+                    Path(json_file),
+                    output_dir,
+                    context,
+                    use_acreditacion=use_acreditacion,
+                    both_mode=both_mode,
+                    interval=args.watch_interval,
+                    writer=writer,
+                    cache=cache,
+                ).run()
+            return
+
+        logger.info(f"Cargando personas desde {json_file}...")
+        personas = cargar_personas(json_file)
+        logger.info(f"Cargadas {len(personas)} personas")
+
+        exitosos = 0
+        fallidos = 0
+        # Filtro calculado de una vez sobre la columna, sin materializar personas
+        process_mask = None if both_mode else personas.process_mask(use_acreditacion)
+
+        # Índice para verificar los QR en la entrada (python -m pkpass_builder.verify).
+        # Se vuelca por bloques durante la generación y, si la ejecución termina sin
+        # fallos, sustituye a los pases anteriores del mismo tipo (los check-ins se conservan)
+        from .verify import CHECKIN_INDEX_FILENAME, IndexWriter
+
+        index_path = output_dir / CHECKIN_INDEX_FILENAME
+
+        # La generación (CPU) se solapa con la escritura en disco del hilo escritor
+        with writer, IndexWriter(index_path, writer=writer, replace=True) as index:
+            for i, persona in enumerate(personas, 1):
+                if process_mask is not None and not process_mask[i - 1]:
+                    logger.info(
+                        "[SKIP] %s — modo: %s — (acreditacion: %s)",
+                        persona.nombre,
+                        "acreditacion" if use_acreditacion else "entrada",
+                        persona.acreditacion,
+                    )
+                    continue
 
-    for i, persona in enumerate(personas, 1):
-        # Modo BOTH: generar badge (si tiene acreditación) y/o entrada (si no tiene acreditación)
-        if both_mode:
-            # badges: solo si persona tiene acreditacion
-            if persona.acreditacion:
-                id_used = persona.acreditacion
-                logger.info(f"[{i}/{len(personas)}] {persona.nombre} (badge: {id_used})...")
-                try:
-                    result = generate_pass(persona, use_acreditacion=True)
-                    file_base = (
-                        str(persona.token) if persona.token else str(id_used)
+                for job in plan_jobs(persona, use_acreditacion, both_mode):
+                    logger.info(
+                        f"[{i}/{len(personas)}] {persona.nombre} ({job.tipo}: {job.id_used})..."
                     )
-                    file_base = file_base.replace("@", "_").replace(".", "_").replace("/", "_").replace(" ", "_")
-                    pkpass_path = output_dir / "pass" / "badges" / f"{file_base}.pkpass"
-                    pkpass_path.write_bytes(result.pkpass)
-                    qr_path = output_dir / "qr" / "badges" / f"{file_base}.png"
-                    qr_path.write_bytes(result.qr_png)
-                    logger.info("Generado badge — fichero: %s", pkpass_path.name)
-                    exitosos += 1
-                except Exception:
-                    logger.exception("Error generando badge para %s", id_used)
-                    fallidos += 1
-
-            # entradas: generar siempre (también para personas con acreditacion)
-            id_used = persona.correo
-            logger.info(f"[{i}/{len(personas)}] {persona.nombre} (entrada: {id_used})...")
-            try:
-                result = generate_pass(persona, use_acreditacion=False)
-                file_base = (
-                    str(persona.token) if persona.token else str(id_used)
-                )
-                file_base = file_base.replace("@", "_").replace(".", "_").replace("/", "_").replace(" ", "_")
-                pkpass_path = output_dir / "pass" / "entradas" / f"{file_base}.pkpass"
-                pkpass_path.write_bytes(result.pkpass)
-                qr_path = output_dir / "qr" / "entradas" / f"{file_base}.png"
-                qr_path.write_bytes(result.qr_png)
-                logger.info("Generado entrada — fichero: %s", pkpass_path.name)
-                exitosos += 1
-            except Exception:
-                logger.exception("Error generando entrada para %s", id_used)
-                fallidos += 1
-
-            # continuar al siguiente persona
-            continue
-
-        # Modo exclusivo (como antes)
-        if not should_process_persona(persona, use_acreditacion):
-            logger.info(
-                "[SKIP] %s — modo: %s — (acreditacion: %s)",
-                persona.nombre,
-                "acreditacion" if use_acreditacion else "entrada",
-                persona.acreditacion,
+                    try:
+                        result = generate_pass(persona, job.use_acreditacion, context, cache)
+                        pkpass_path = write_pass_result(output_dir, job, result, writer)
+                        logger.info("Generado %s — fichero: %s", job.tipo, pkpass_path.name)
+                        index.add(job)
+                        exitosos += 1
+                    except Exception:
+                        logger.exception("Error generando %s para %s", job.tipo, job.id_used)
+                        index.fail(job)
+                        fallidos += 1
+
+        if writer.errors:
+            logger.error(f"Error escribiendo {len(writer.errors)} ficheros de salida")
+        # Los pases cuyo .pkpass o QR no llegó a disco, o sin código QR que
+        # indexar, cuentan como fallidos (y no entran en el índice)
+        fallidos += index.failed + index.unindexed
+        exitosos -= index.failed + index.unindexed
+
+        if args.print_badges:
+            from .badges import write_badge_sheets
+
+            badge_jobs = (
+                job
+                for persona in personas.rows(personas.select(True))
+                for job in plan_jobs(persona, True, False)
+            )
+            write_badge_sheets(
+                badge_jobs,
+                context,
+                output_dir / "print" / "badges.pdf",
+                per_page=args.badges_per_page,
             )
-            continue
-
-        id_used = persona.acreditacion if (use_acreditacion and persona.acreditacion) else persona.correo
-        logger.info(f"[{i}/{len(personas)}] {persona.nombre} ({id_used})...")
-        try:
-            result = generate_pass(persona, use_acreditacion=use_acreditacion)
-
-            # Si el JSON incluye `token`, usarlo como nombre base del fichero (sanitizado)
-            if persona.token:
-                file_base = (
-                    str(persona.token).replace("@", "_").replace("/", "_").replace(" ", "_")
-                )
-            else:
-                file_base = (
-                    str(id_used).replace("@", "_").replace(".", "_").replace(" ", "_")
-                )
-
-            # Guardar en subcarpeta correspondiente
-            subfolder = "badges" if use_acreditacion else "entradas"
-            pkpass_path = output_dir / "pass" / subfolder / f"{file_base}.pkpass"
-            pkpass_path.write_bytes(result.pkpass)
-            qr_path = output_dir / "qr" / subfolder / f"{file_base}.png"
-            qr_path.write_bytes(result.qr_png)
-            logger.info("Generado — fichero: %s", pkpass_path.name)
-            exitosos += 1
-        except Exception:
-            logger.exception("Error generando pase para %s", id_used)
-            fallidos += 1
 
     logger.info("=" * 50)
     logger.info(f"Exitosos: {exitosos}")
     logger.info(f"Fallidos: {fallidos}")
+    if writer.skipped:
+        logger.info(f"Sin cambios (no reescritos): {writer.skipped}")
+    if cache is not None:
+        stats = cache.stats()
+        logger.info(
+            f"Caché: {stats['hits'] + stats['disk_hits']} aciertos, {stats['misses']} fallos, "
+            f"{stats['evictions']} expulsiones"
+        )
     logger.info(f"Passkits guardados en: {output_dir.absolute()}")
     logger.info(f"QR codes guardados en: {(output_dir / 'qr').absolute()}")
+    logger.info(f"Índice de check-in: {index_path.absolute()}")
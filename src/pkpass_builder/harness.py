@@ -0,0 +1,434 @@
+"""Banco de pruebas de escala y memoria con asistentes sintéticos.
+
+Genera un JSON de personas sintéticas (con casos límite), un certificado de
+pruebas autofirmado y ejecuta la CLI completa en un subproceso, midiendo:
+
+- throughput (pases por segundo)
+- pico de memoria residente (RSS)
+- pico de descriptores de fichero abiertos
+- uso del directorio temporal (pico y restos al terminar)
+- bytes de salida por pase
+
+Con `--cold` se llama a `generate_pass` en el propio proceso sin contexto
+compartido (un `TemporaryDirectory` por pase) para cazar fugas en ese ciclo.
+
+Si se supera algún presupuesto termina con código 1, así que sirve tanto para
+una prueba manual antes del evento como para CI.
+
+Uso:
+    python -m pkpass_builder.harness --count 10000 --max-rss-mb 300
+"""
+
+import json
+import logging
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Directorio que contiene el paquete (src/), para lanzar `python -m pkpass_builder`
+SRC_DIR = Path(__file__).resolve().parents[1]
+
+ROLES = ["Hacker", "Mentor", "Patrocinador", "Organización", "Voluntariado"]
+
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+
+def synthetic_persona(i: int) -> dict:
+    """Persona sintética `i`. Cada cierto número aparece un caso límite."""
+    item = {
+        "correo": f"asistente{i}@example.com",
+        "nombre": f"Asistente {i}",
+        "acreditacion": f"AC{i:07d}",
+        "token": f"tok_{i}",
+        "rol": ROLES[i % len(ROLES)],
+    }
+
+    if i % 7 == 0:
+        # Nombre muy largo
+        item["nombre"] = "María de los Ángeles " + "Fernández-Castro " * 20
+    if i % 11 == 0:
+        # Unicode variado: acentos combinados, CJK, RTL y emoji
+        item["nombre"] = f"Zoë Ñúñez 李小龙 محمد 🎉 é {i}"
+        item["correo"] = f"zoë.ñúñez{i}@exämple.com"
+    if i % 5 == 0:
+        # Sin acreditación: unas veces null, otras sin la clave
+        if i % 10 == 0:
+            del item["acreditacion"]
+        else:
+            item["acreditacion"] = None
+    if i % 13 == 0:
+        # Token duplicado con otra persona (colisión de nombre de fichero)
+        item["token"] = f"tok_{i - 1}"
+    if i % 17 == 0:
+        # Token con caracteres que hay que sanear
+        item["token"] = f"equipo/{i} @sede"
+    if i % 19 == 0:
+        del item["rol"]
+
+    return item
+
+
+def write_personas(path: Path, count: int) -> int:
+    """Escribe `count` personas en `path` sin mantenerlas todas en memoria."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(count):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(synthetic_persona(i), ensure_ascii=False))
+        f.write("\n]\n")
+    return path.stat().st_size
+
+
+def make_test_certificates(cert_dir: Path, password: str = "harness") -> dict[str, str]:
+    """Crea un P12 autofirmado y un WWDR (DER) de pruebas con openssl.
+
+    Returns:
+        Variables de entorno PASSKIT_* para usarlos
+    """
+    cert_dir.mkdir(parents=True, exist_ok=True)
+    key, cert = cert_dir / "signer.key", cert_dir / "signer.pem"
+    p12 = cert_dir / "signer.p12"
+    wwdr_key, wwdr_pem = cert_dir / "wwdr.key", cert_dir / "wwdr.pem"
+    wwdr_der = cert_dir / "wwdr.cer"
+
+    def openssl(*args):
+        subprocess.run(["openssl", *args], check=True, capture_output=True)
+
+    for k, c, cn in ((key, cert, "pkpassBuilder harness"), (wwdr_key, wwdr_pem, "harness WWDR")):
+        openssl(
+            "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+            "-subj", f"/CN={cn}", "-keyout", str(k), "-out", str(c),
+        )  # fmt: skip
+    openssl(
+        "pkcs12", "-export", "-in", str(cert), "-inkey", str(key),
+        "-out", str(p12), "-passout", f"pass:{password}",
+    )  # fmt: skip
+    openssl("x509", "-in", str(wwdr_pem), "-outform", "DER", "-out", str(wwdr_der))
+
+    return {
+        "PASSKIT_CERT_P12_PATH": str(p12),
+        "PASSKIT_CERT_P12_PASSWORD": password,
+        "PASSKIT_WWDR_CERT_PATH": str(wwdr_der),
+        "PASSKIT_TEAM_ID": "HARNESS000",
+        "PASSKIT_PASS_TYPE_ID": "pass.org.example.harness",
+    }
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+
+@dataclass
+class Metrics:
+    """Resultado de una ejecución del banco de pruebas."""
+
+    personas: int = 0
+    exitosos: int = 0
+    fallidos: int = 0
+    elapsed_s: float = 0.0
+    throughput: float = 0.0
+    peak_rss_mb: float = 0.0
+    peak_fds: int = 0
+    peak_tmp_mb: float = 0.0
+    leftover_tmp_entries: int = 0
+    fd_growth: int = 0
+    output_bytes: int = 0
+    bytes_per_pass: float = 0.0
+    returncode: int = 0
+    violations: list[str] = field(default_factory=list)
+
+
+def _dir_usage(path: Path) -> tuple[int, int]:
+    """(bytes, entradas) bajo `path`, tolerando ficheros que desaparecen."""
+    total = entries = 0
+    for root, dirs, files in os.walk(path):
+        entries += len(dirs) + len(files)
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total, entries
+
+
+class ProcessSampler(threading.Thread):
+    """Muestrea RSS, descriptores abiertos y uso del TMPDIR de un proceso hijo."""
+
+    def __init__(self, pid: int, tmp_dir: Path, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.tmp_dir = tmp_dir
+        self.interval = interval
+        self.peak_rss_kb = 0
+        self.peak_fds = 0
+        self.peak_tmp_bytes = 0
+        self._done = threading.Event()
+
+    def _sample(self):
+        proc = Path("/proc") / str(self.pid)
+        try:
+            for line in (proc / "status").read_text().splitlines():
+                if line.startswith(("VmHWM:", "VmRSS:")):
+                    self.peak_rss_kb = max(self.peak_rss_kb, int(line.split()[1]))
+            self.peak_fds = max(self.peak_fds, len(os.listdir(proc / "fd")))
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            pass
+        self.peak_tmp_bytes = max(self.peak_tmp_bytes, _dir_usage(self.tmp_dir)[0])
+
+    def run(self):
+        while not self._done.is_set():
+            self._sample()
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _children_maxrss_kb() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # macOS devuelve bytes; Linux, kilobytes
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def run_cli(
+    json_file: Path,
+    work_dir: Path,
+    env: dict[str, str],
+    cli_args: list[str],
+) -> Metrics:
+    """Ejecuta la CLI completa sobre `json_file` y devuelve las métricas."""
+    output_dir = work_dir / "output"
+    tmp_dir = work_dir / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    log_path = work_dir / "cli.log"
+
+    child_env = {
+        **os.environ,
+        **env,
+        "TMPDIR": str(tmp_dir),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")])),
+    }
+    cmd = [
+        sys.executable, "-m", "pkpass_builder", str(json_file),
+        "--output-dir", str(output_dir), *cli_args,
+    ]  # fmt: skip
+
+    metrics = Metrics()
+    start = time.perf_counter()
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(cmd, env=child_env, stdout=log, stderr=subprocess.STDOUT)
+        sampler = ProcessSampler(proc.pid, tmp_dir)
+        sampler.start()
+        metrics.returncode = proc.wait()
+        sampler.stop()
+    metrics.elapsed_s = time.perf_counter() - start
+
+    metrics.peak_rss_mb = max(sampler.peak_rss_kb, _children_maxrss_kb()) / 1024
+    metrics.peak_fds = sampler.peak_fds
+    metrics.peak_tmp_mb = sampler.peak_tmp_bytes / 1024 / 1024
+    metrics.leftover_tmp_entries = _dir_usage(tmp_dir)[1]
+
+    # Resumen que imprime la CLI al terminar
+    with open(log_path, "rb") as log:
+        log.seek(max(0, log_path.stat().st_size - 4096))
+        tail = log.read().decode("utf-8", errors="replace")
+    for name in ("Exitosos", "Fallidos"):
+        match = re.search(rf"{name}: (\d+)", tail)
+        if match:
+            setattr(metrics, name.lower(), int(match.group(1)))
+
+    # Los tokens repetidos de los datos sintéticos escriben el mismo fichero, así
+    # que el tamaño medio se calcula sobre los .pkpass que hay en disco
+    pkpass_sizes = [f.stat().st_size for f in (output_dir / "pass").rglob("*.pkpass")]
+    metrics.output_bytes = sum(pkpass_sizes)
+    if metrics.exitosos:
+        metrics.throughput = metrics.exitosos / metrics.elapsed_s
+    if pkpass_sizes:
+        metrics.bytes_per_pass = metrics.output_bytes / len(pkpass_sizes)
+    return metrics
+
+
+def _open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except FileNotFoundError:
+        return 0
+
+
+def run_cold(json_file: Path, work_dir: Path, env: dict[str, str], use_acreditacion: bool) -> Metrics:
+    """Genera en este proceso sin contexto compartido: un TemporaryDirectory por pase.
+
+    Sirve para detectar fugas de memoria, descriptores o ficheros temporales en
+    el ciclo completo de `generate_pass` repetido miles de veces.
+    """
+    tmp_dir = work_dir / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    os.environ.update(env)
+    tempfile.tempdir = str(tmp_dir)
+
+    # La configuración se lee de las variables de entorno al importar
+    from .generate import cargar_personas, generate_pass, should_process_persona
+
+    personas = cargar_personas(str(json_file))
+    metrics = Metrics()
+    sampler = ProcessSampler(os.getpid(), tmp_dir)
+    fds_before = _open_fds()
+    sampler.start()
+    start = time.perf_counter()
+    for persona in personas:
+        if not should_process_persona(persona, use_acreditacion):
+            continue
+        try:
+            result = generate_pass(persona, use_acreditacion)
+        except Exception:
+            logger.exception("Error generando pase para %s", persona.correo)
+            metrics.fallidos += 1
+            continue
+        metrics.exitosos += 1
+        metrics.output_bytes += len(result.pkpass)
+    metrics.elapsed_s = time.perf_counter() - start
+    sampler.stop()
+
+    metrics.fd_growth = _open_fds() - fds_before
+    metrics.peak_rss_mb = sampler.peak_rss_kb / 1024
+    metrics.peak_fds = sampler.peak_fds
+    metrics.peak_tmp_mb = sampler.peak_tmp_bytes / 1024 / 1024
+    metrics.leftover_tmp_entries = _dir_usage(tmp_dir)[1]
+    if metrics.exitosos:
+        metrics.throughput = metrics.exitosos / metrics.elapsed_s
+        metrics.bytes_per_pass = metrics.output_bytes / metrics.exitosos
+    return metrics
+
+
+def check_budgets(metrics: Metrics, args) -> list[str]:
+    """Compara las métricas con los presupuestos. Devuelve las violaciones."""
+    violations = []
+    if metrics.returncode != 0:
+        violations.append(f"la CLI terminó con código {metrics.returncode}")
+    if metrics.fallidos > args.max_failures:
+        violations.append(f"fallidos {metrics.fallidos} > {args.max_failures}")
+    if args.max_rss_mb is not None and metrics.peak_rss_mb > args.max_rss_mb:
+        violations.append(f"RSS pico {metrics.peak_rss_mb:.1f} MB > {args.max_rss_mb} MB")
+    if args.max_fds is not None and metrics.peak_fds > args.max_fds:
+        violations.append(f"descriptores pico {metrics.peak_fds} > {args.max_fds}")
+    if args.max_tmp_mb is not None and metrics.peak_tmp_mb > args.max_tmp_mb:
+        violations.append(f"TMPDIR pico {metrics.peak_tmp_mb:.1f} MB > {args.max_tmp_mb} MB")
+    if metrics.fd_growth > 0:
+        violations.append(f"{metrics.fd_growth} descriptores más abiertos al terminar (fuga)")
+    if metrics.leftover_tmp_entries > 0:
+        violations.append(f"quedan {metrics.leftover_tmp_entries} entradas en TMPDIR (fuga)")
+    if args.min_throughput is not None and metrics.throughput < args.min_throughput:
+        violations.append(
+            f"throughput {metrics.throughput:.1f} pases/s < {args.min_throughput} pases/s"
+        )
+    if args.max_bytes_per_pass is not None and metrics.bytes_per_pass > args.max_bytes_per_pass:
+        violations.append(
+            f"{metrics.bytes_per_pass:.0f} bytes/pase > {args.max_bytes_per_pass} bytes/pase"
+        )
+    return violations
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="pkpass_builder.harness",
+        description="Prueba de escala y memoria de la CLI con asistentes sintéticos",
+    )
+    parser.add_argument("-n", "--count", type=int, default=10_000, help="Número de personas")
+    parser.add_argument(
+        "--mode",
+        choices=["entradas", "badges", "both"],
+        default="entradas",
+        help="Modo de la CLI a probar (por defecto: entradas)",
+    )
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Generar en proceso sin contexto compartido (un TemporaryDirectory por pase) "
+        "en lugar de lanzar la CLI",
+    )
+    parser.add_argument("--work-dir", help="Directorio de trabajo (por defecto: uno temporal)")
+    parser.add_argument("--keep", action="store_true", help="No borrar el directorio de trabajo")
+    parser.add_argument("--max-rss-mb", type=float, help="Presupuesto de RSS pico (MB)")
+    parser.add_argument("--max-fds", type=int, default=64, help="Máximo de descriptores abiertos")
+    parser.add_argument("--max-tmp-mb", type=float, default=50, help="Máximo uso de TMPDIR (MB)")
+    parser.add_argument("--min-throughput", type=float, help="Mínimo de pases por segundo")
+    parser.add_argument("--max-bytes-per-pass", type=float, help="Máximo de bytes por pase")
+    parser.add_argument("--max-failures", type=int, default=0, help="Máximo de pases fallidos")
+    args = parser.parse_args()
+
+    if shutil.which("openssl") is None:
+        logger.error("Error: openssl no está disponible en el PATH")
+        sys.exit(1)
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="pkpass-harness-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    failed = True
+    try:
+        logger.info(f"Directorio de trabajo: {work_dir}")
+        env = make_test_certificates(work_dir / "cert")
+
+        json_file = work_dir / "personas.json"
+        size = write_personas(json_file, args.count)
+        logger.info(f"Generadas {args.count} personas sintéticas ({size / 1024 / 1024:.1f} MB)")
+
+        if args.cold:
+            if args.mode == "both":
+                parser.error("--cold no admite --mode both")
+            metrics = run_cold(json_file, work_dir, env, args.mode == "badges")
+        else:
+            cli_args = {"entradas": [], "badges": ["--use-acreditacion"], "both": ["--both"]}
+            metrics = run_cli(json_file, work_dir, env, cli_args[args.mode])
+        metrics.personas = args.count
+        metrics.violations = check_budgets(metrics, args)
+
+        (work_dir / "report.json").write_text(json.dumps(asdict(metrics), indent=2))
+
+        logger.info("=" * 50)
+        logger.info(
+            f"Personas: {metrics.personas} — modo: {args.mode}{' (cold)' if args.cold else ''}"
+        )
+        logger.info(f"Exitosos: {metrics.exitosos} — Fallidos: {metrics.fallidos}")
+        logger.info(f"Tiempo: {metrics.elapsed_s:.1f}s — {metrics.throughput:.1f} pases/s")
+        logger.info(f"RSS pico: {metrics.peak_rss_mb:.1f} MB")
+        logger.info(f"Descriptores pico: {metrics.peak_fds} — crecimiento: {metrics.fd_growth}")
+        logger.info(
+            f"TMPDIR pico: {metrics.peak_tmp_mb:.2f} MB — "
+            f"restos: {metrics.leftover_tmp_entries}"
+        )
+        logger.info(f"Salida: {metrics.bytes_per_pass:.0f} bytes/pase")
+        logger.info(f"Informe: {work_dir / 'report.json'}")
+
+        if metrics.violations:
+            for violation in metrics.violations:
+                logger.error(f"PRESUPUESTO SUPERADO: {violation}")
+            logger.error(f"Log de la CLI: {work_dir / 'cli.log'}")
+            sys.exit(1)
+        logger.info("Todos los presupuestos cumplidos")
+        failed = False
+    finally:
+        # Si algo falla se conserva el directorio para revisar el log
+        if not failed and not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -0,0 +1,320 @@
+"""Tabla compacta de personas para listas muy grandes.
+
+En lugar de un objeto `Persona` (con su `__dict__` y un `str` por campo) por
+asistente, `PersonaTable` guarda cada campo como una columna:
+
+    - Texto (correo, nombre, ...): un único buffer UTF-8 con offsets en un
+      `array`, más un bitmap de nulos para distinguir `None` de "".
+    - Categóricos (rol, idioma): códigos en un `array('H')` y la lista de valores
+      distintos, cada uno guardado una sola vez.
+    - Booleanos (mentor, patrocinador): un `bytearray`.
+
+Las búsquedas por correo, acreditación o token usan tablas hash de
+direccionamiento abierto sobre `array`, con un hash estable (crc32): todo el
+estado son `bytes`/`array`/listas pequeñas, así que la tabla se serializa con
+pickle casi sin coste para enviarla a procesos de trabajo.
+
+Las filas se materializan como `Persona` solo al acceder a ellas.
+"""
+
+import json
+import zlib
+from array import array
+from itertools import compress
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from .generate import Persona, persona_from_dict
+
+_TEXT_FIELDS = ("correo", "nombre", "acreditacion", "token", "dni")
+_CATEGORY_FIELDS = ("rol", "idioma")
+_BOOL_FIELDS = ("mentor", "patrocinador")
+_INDEXED_FIELDS = ("correo", "acreditacion", "token")
+
+_EMPTY = -1
+
+_WHITESPACE = json.decoder.WHITESPACE
+
+
+def iter_json_array(f: IO[str], chunk_size: int = 1 << 20) -> Iterator:
+    """Recorre los elementos de un array JSON de uno en uno, leyendo por bloques.
+
+    Solo se mantiene en memoria el bloque en curso y el elemento que se está
+    decodificando: ni el texto completo del fichero ni la lista de registros
+    (con `json.load` existen ambos a la vez).
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return buf[pos : pos + 1]
+            fill()
+
+    if next_char() != "[":
+        raise ValueError("El JSON de personas debe ser una lista")
+    pos += 1
+    if next_char() == "]":
+        pos += 1
+    else:
+        while True:
+            next_char()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                if end < len(buf) or eof:
+                    break
+                # Un número puede seguir en el siguiente bloque
+                fill()
+            pos = end
+            yield item
+            separator = next_char()
+            pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise json.JSONDecodeError("Se esperaba ',' o ']'", buf, pos - 1)
+    if next_char():
+        raise json.JSONDecodeError("Datos extra tras la lista", buf, pos)
+
+
+class TextColumn:
+    """Columna de texto: buffer UTF-8 + offsets + bitmap de nulos."""
+
+    __slots__ = ("data", "offsets", "nulls")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("I", [0])
+        self.nulls = bytearray()
+
+    def append(self, value):
+        if not isinstance(value, str):
+            if not value:
+                # `false`/`0` del JSON son "sin valor", igual que en `Persona`
+                value = None
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                # Un DNI o acreditación numéricos se guardan como texto
+                value = str(value)
+            else:
+                raise ValueError(f"Valor no admitido en un campo de texto: {value!r}")
+        if value is None:
+            self.nulls.append(1)
+        else:
+            self.nulls.append(0)
+            self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def freeze(self):
+        self.data = bytes(self.data)
+        self.nulls = bytes(self.nulls)
+
+    def __getitem__(self, row: int) -> str | None:
+        if self.nulls[row]:
+            return None
+        return self.data[self.offsets[row] : self.offsets[row + 1]].decode("utf-8")
+
+    def non_empty(self) -> Iterator[bool]:
+        """Máscara de filas con valor no vacío (equivale a `bool(valor)`)."""
+        offsets = self.offsets
+        return map(int.__lt__, offsets, offsets[1:])
+
+
+class CategoryColumn:
+    """Columna categórica: cada valor distinto se guarda una sola vez."""
+
+    __slots__ = ("codes", "categories", "_lookup")
+
+    def __init__(self):
+        self.codes = array("H")
+        self.categories: list = []
+        self._lookup: dict = {}
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+        self.codes.append(code)
+
+    def freeze(self):
+        pass
+
+    def __getitem__(self, row: int):
+        return self.categories[self.codes[row]]
+
+    def __getstate__(self):
+        return self.codes, self.categories
+
+    def __setstate__(self, state):
+        self.codes, self.categories = state
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    def isin(self, values: Iterable) -> Iterator[bool]:
+        """Máscara de filas cuyo valor está en `values`."""
+        wanted = {self._lookup[v] for v in values if v in self._lookup}
+        return map(wanted.__contains__, self.codes)
+
+
+class HashIndex:
+    """Índice hash (direccionamiento abierto) de una columna de texto."""
+
+    __slots__ = ("column", "slots", "mask")
+
+    def __init__(self, column: TextColumn, rows: int):
+        size = 8
+        while size < rows * 2:
+            size *= 2
+        self.column = column
+        self.mask = size - 1
+        self.slots = array("i", [_EMPTY]) * size
+        for row in range(rows):
+            if column.nulls[row] or column.offsets[row] == column.offsets[row + 1]:
+                continue
+            raw = column.data[column.offsets[row] : column.offsets[row + 1]]
+            slot = zlib.crc32(raw) & self.mask
+            while True:
+                current = self.slots[slot]
+                if current == _EMPTY:
+                    self.slots[slot] = row
+                    break
+                if self._raw(current) == raw:
+                    # Con claves repetidas gana la primera fila
+                    break
+                slot = (slot + 1) & self.mask
+
+    def _raw(self, row: int) -> bytes:
+        offsets = self.column.offsets
+        return self.column.data[offsets[row] : offsets[row + 1]]
+
+    def get(self, key: str) -> int | None:
+        if not key:
+            return None
+        raw = key.encode("utf-8")
+        slot = zlib.crc32(raw) & self.mask
+        while True:
+            row = self.slots[slot]
+            if row == _EMPTY:
+                return None
+            if self._raw(row) == raw:
+                return row
+            slot = (slot + 1) & self.mask
+
+
+class PersonaTable:
+    """Personas en formato columnar, con acceso por fila y búsquedas O(1).
+
+    Se comporta como una secuencia de solo lectura de `Persona` (`len`,
+    índices, iteración), así que sustituye a la lista de `cargar_personas`.
+    """
+
+    __slots__ = ("_rows", "_columns", "_indexes")
+
+    def __init__(self, records: Iterable[dict] = ()):
+        self._columns = {name: TextColumn() for name in _TEXT_FIELDS}
+        self._columns.update({name: CategoryColumn() for name in _CATEGORY_FIELDS})
+        self._columns.update({name: bytearray() for name in _BOOL_FIELDS})
+        self._rows = 0
+        for item in records:
+            persona = persona_from_dict(item)
+            for name in _TEXT_FIELDS + _CATEGORY_FIELDS:
+                self._columns[name].append(getattr(persona, name))
+            for name in _BOOL_FIELDS:
+                self._columns[name].append(bool(getattr(persona, name)))
+            self._rows += 1
+        for name in _TEXT_FIELDS + _CATEGORY_FIELDS:
+            self._columns[name].freeze()
+        for name in _BOOL_FIELDS:
+            self._columns[name] = bytes(self._columns[name])
+        self._indexes = {
+            name: HashIndex(self._columns[name], self._rows) for name in _INDEXED_FIELDS
+        }
+
+    @classmethod
+    def from_json(cls, path: str | Path) -> "PersonaTable":
+        """Carga un JSON de personas añadiendo cada registro a la tabla según se lee."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(iter_json_array(f))
+
+    # --- Secuencia de Persona ----------------------------------------------
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, row: int) -> Persona:
+        if row < 0:
+            row += self._rows
+        if not 0 <= row < self._rows:
+            raise IndexError("fila fuera de rango")
+        columns = self._columns
+        return Persona(
+            **{name: columns[name][row] for name in _TEXT_FIELDS + _CATEGORY_FIELDS},
+            **{name: bool(columns[name][row]) for name in _BOOL_FIELDS},
+        )
+
+    def __iter__(self) -> Iterator[Persona]:
+        for row in range(self._rows):
+            yield self[row]
+
+    def rows(self, selection: Iterable[int]) -> Iterator[Persona]:
+        """Materializa solo las filas indicadas."""
+        for row in selection:
+            yield self[row]
+
+    # --- Búsquedas -----------------------------------------------------------
+
+    def find(self, field: str, value: str) -> Persona | None:
+        """Busca por `correo`, `acreditacion` o `token` en tiempo constante."""
+        row = self._indexes[field].get(value)
+        return None if row is None else self[row]
+
+    def by_correo(self, correo: str) -> Persona | None:
+        return self.find("correo", correo)
+
+    def by_acreditacion(self, acreditacion: str) -> Persona | None:
+        return self.find("acreditacion", acreditacion)
+
+    def by_token(self, token: str) -> Persona | None:
+        return self.find("token", token)
+
+    # --- Filtros sobre columnas ----------------------------------------------
+
+    def process_mask(self, use_acreditacion: bool) -> bytes:
+        """Máscara (un byte por fila) equivalente a `should_process_persona`."""
+        if use_acreditacion:
+            return bytes(self._columns["acreditacion"].non_empty())
+        return b"\x01" * self._rows
+
+    def select(self, use_acreditacion: bool) -> array:
+        """Filas a procesar en el modo dado, sin materializar ninguna Persona."""
+        return array("I", compress(range(self._rows), self.process_mask(use_acreditacion)))
+
+    def with_role(self, *roles: str) -> array:
+        """Filas cuyo `rol` es alguno de `roles`."""
+        return array("I", compress(range(self._rows), self._columns["rol"].isin(roles)))
+
+    def roles(self) -> dict[str, int]:
+        """Número de personas por rol."""
+        column = self._columns["rol"]
+        return {value: column.codes.count(code) for code, value in enumerate(column.categories)}
+
+    def __getstate__(self):
+        return self._rows, self._columns, self._indexes
+
+    def __setstate__(self, state):
+        self._rows, self._columns, self._indexes = state
@@ -0,0 +1,439 @@
+"""Índice de verificación y servicio local de check-in.
+
+La generación vuelca en `output/checkin.sqlite3` una tabla que relaciona el
+contenido de cada QR (correo o acreditación) con nombre, rol y tipo de pase.
+El servidor carga esa tabla en memoria para responder cada escaneo en tiempo
+constante y registra los check-ins en la misma base de datos, detectando
+escaneos duplicados.
+
+Uso:
+    python -m pkpass_builder.verify output/checkin.sqlite3 --port 8080
+
+Por defecto solo escucha en 127.0.0.1. Para aceptar escáneres de la red hay
+que fijar un token compartido, que cada petición envía en la cabecera
+`X-Checkin-Token` o en el parámetro `token`:
+    python -m pkpass_builder.verify --host 0.0.0.0 --token "$CHECKIN_TOKEN"
+
+Endpoints:
+    GET  /verify?code=...               Consulta sin registrar
+    GET  /checkin?code=...&scanner=...  Registra la entrada
+    POST /checkin {"code": ..., "scanner": ...}
+
+Respuestas: 200 (válido), 409 (ya había entrado), 404 (código desconocido).
+"""
+
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import parse_qs, urlparse
+
+from .generate import OUTPUT_DIR, PassJob
+
+logger = logging.getLogger(__name__)
+
+CHECKIN_INDEX_FILENAME = "checkin.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS passes (
+    payload TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    run INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS checkins (
+    payload TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    scans INTEGER NOT NULL,
+    scanner TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+"""
+
+_UPSERT = (
+    "INSERT INTO passes (payload, nombre, rol, tipo, run) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(payload) DO UPDATE SET "
+    "nombre = excluded.nombre, rol = excluded.rol, tipo = excluded.tipo, run = excluded.run"
+)
+
+
+def open_index(path: str | Path) -> sqlite3.Connection:
+    """Abre (o crea) el índice de check-in en modo WAL."""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    # Índices creados antes de existir la columna `run`
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(passes)")}
+    if "run" not in columns:
+        conn.execute("ALTER TABLE passes ADD COLUMN run INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+
+def index_row(job: PassJob) -> tuple[str, str, str, str]:
+    """Fila del índice para un pase: (payload, nombre, rol, tipo).
+
+    El payload puede ser None (p. ej. una entrada sin `correo`); `IndexWriter`
+    no indexa esas filas.
+    """
+    return job.id_used, job.persona.nombre or "", job.persona.rol or "Hacker", job.tipo
+
+
+class IndexWriter:
+    """Vuelca los pases generados al índice por bloques, durante la generación.
+
+    Solo retiene las filas del bloque en curso, así que la memoria no crece con
+    el número de pases, y si la ejecución se interrumpe los bloques ya escritos
+    quedan en el índice.
+
+    Args:
+        path: Ruta del índice
+        writer: `PassWriter` opcional; antes de cada bloque se espera a que haya
+            escrito todo y se descartan los pases cuyo `.pkpass` o QR falló
+        chunk_size: Pases por bloque
+        replace: Al cerrar sin errores, borrar los pases de los tipos generados
+            en esta ejecución que no se han vuelto a escribir (los check-ins se
+            conservan). Si algún pase falla no se borra nada: su pase anterior
+            sigue siendo válido
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        writer=None,
+        chunk_size: int = 1000,
+        replace: bool = False,
+    ):
+        self.conn = open_index(path)
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.replace = replace
+        self.run = time.time_ns()
+
+        self.written = 0
+        self.failed = 0
+        # Pases sin contenido de QR (p. ej. entrada sin correo): no se pueden indexar
+        self.unindexed = 0
+        self.tipos: set[str] = set()
+
+        self._incomplete = False
+        self._pending: list[tuple[str, str, tuple]] = []
+        self._failed_files: set[tuple[str, str]] = set()
+        self._errors_seen = 0
+
+    def add(self, job: PassJob):
+        self.tipos.add(job.tipo)
+        row = index_row(job)
+        if not row[0]:
+            logger.warning("[INDEX] %s de %s sin código QR: no se indexa", job.tipo, job.file_base)
+            self.unindexed += 1
+            return
+        self._pending.append((job.subfolder, job.file_base, row))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def fail(self, job: PassJob):
+        """Registra un pase que no se pudo generar: su fila anterior se conserva."""
+        self.tipos.add(job.tipo)
+        self._incomplete = True
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+            for path, _ in self.writer.errors[self._errors_seen :]:
+                self._failed_files.add((path.parent.name, path.stem))
+            self._errors_seen = len(self.writer.errors)
+
+        rows = [
+            (*row, self.run)
+            for subfolder, file_base, row in self._pending
+            if (subfolder, file_base) not in self._failed_files
+        ]
+        self.failed += len(self._pending) - len(rows)
+        self._pending.clear()
+        if rows:
+            with self.conn:
+                self.conn.executemany(_UPSERT, rows)
+            self.written += len(rows)
+
+    def remove(self, payloads: Iterable[str]) -> int:
+        """Borra pases del índice (p. ej. registros eliminados en modo watch)."""
+        with self.conn:
+            cursor = self.conn.executemany(
+                "DELETE FROM passes WHERE payload = ?", ((payload,) for payload in payloads)
+            )
+        return cursor.rowcount
+
+    def close(self, complete: bool = True):
+        try:
+            self.flush()
+            if self.replace and complete and self.tipos and not (self.failed or self._incomplete):
+                # Solo los tipos de esta ejecución: una con -a no retira las entradas
+                tipos = sorted(self.tipos)
+                placeholders = ", ".join("?" * len(tipos))
+                with self.conn:
+                    self.conn.execute(
+                        f"DELETE FROM passes WHERE run != ? AND tipo IN ({placeholders})",
+                        (self.run, *tipos),
+                    )
+        finally:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(complete=exc_type is None)
+
+
+def write_index(path: str | Path, jobs: Iterable[PassJob]) -> int:
+    """Añade o actualiza en el índice los pases generados.
+
+    No borra registros existentes ni check-ins: se puede regenerar durante el
+    evento sin perder quién ha entrado ya.
+
+    Returns:
+        Número de pases escritos
+    """
+    with IndexWriter(path) as index:
+        for job in jobs:
+            index.add(job)
+    return index.written
+
+
+def remove_from_index(path: str | Path, payloads: Iterable[str]) -> int:
+    """Borra pases del índice conservando sus check-ins. Devuelve cuántos había."""
+    payloads = list(payloads)
+    if not payloads:
+        return 0
+    index = IndexWriter(path)
+    try:
+        return index.remove(payloads)
+    finally:
+        index.close()
+
+
+class CheckinService:
+    """Estado del servicio: pases en memoria y registro de check-ins.
+
+    Las consultas se resuelven con diccionarios en memoria, que se recargan
+    cuando el índice cambia (`PRAGMA data_version`); las escrituras se
+    serializan con un lock y se persisten en SQLite en cada escaneo.
+    """
+
+    def __init__(self, path: str | Path):
+        self.conn = open_index(path)
+        self._lock = threading.Lock()
+        self._version = None
+        self.passes: dict[str, dict] = {}
+        self._refresh()
+        self.checkins = {
+            payload: {"first_seen": first_seen, "scans": scans, "scanner": scanner}
+            for payload, first_seen, scans, scanner in self.conn.execute(
+                "SELECT payload, first_seen, scans, scanner FROM checkins"
+            )
+        }
+
+    def _refresh(self):
+        """Recarga los pases si otra conexión (la generación o --watch) ha cambiado el índice."""
+        with self._lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version:
+                return
+            self._version = version
+            self.passes = {
+                payload: {"nombre": nombre, "rol": rol, "tipo": tipo}
+                for payload, nombre, rol, tipo in self.conn.execute(
+                    "SELECT payload, nombre, rol, tipo FROM passes"
+                )
+            }
+
+    def _find(self, code: str) -> dict | None:
+        self._refresh()
+        return self.passes.get(code)
+
+    def lookup(self, code: str) -> tuple[int, dict]:
+        """Consulta un código sin registrar la entrada."""
+        info = self._find(code)
+        if info is None:
+            return 404, {"valid": False, "code": code}
+        checkin = self.checkins.get(code)
+        return 200, {
+            "valid": True,
+            "code": code,
+            **info,
+            "checked_in": checkin is not None,
+            "first_seen": _iso(checkin["first_seen"]) if checkin else None,
+        }
+
+    def checkin(self, code: str, scanner: str = "") -> tuple[int, dict]:
+        """Registra la entrada de un código y detecta escaneos duplicados."""
+        info = self._find(code)
+        if info is None:
+            logger.warning("[CHECKIN] código desconocido: %s (%s)", code, scanner)
+            return 404, {"valid": False, "code": code}
+
+        now = time.time()
+        with self._lock:
+            previous = self.checkins.get(code)
+            if previous is None:
+                entry = {"first_seen": now, "scans": 1, "scanner": scanner}
+            else:
+                entry = {**previous, "scans": previous["scans"] + 1}
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO checkins (payload, first_seen, last_seen, scans, scanner) "
+                    "VALUES (?, ?, ?, 1, ?) "
+                    "ON CONFLICT(payload) DO UPDATE SET "
+                    "last_seen = excluded.last_seen, scans = scans + 1",
+                    (code, now, now, scanner),
+                )
+            self.checkins[code] = entry
+
+        duplicate = previous is not None
+        if duplicate:
+            logger.warning(
+                "[CHECKIN] DUPLICADO %s — %s (escaneo nº %d)", code, info["nombre"], entry["scans"]
+            )
+        else:
+            logger.info("[CHECKIN] %s — %s (%s)", code, info["nombre"], info["tipo"])
+
+        return (409 if duplicate else 200), {
+            "valid": True,
+            "code": code,
+            **info,
+            "duplicate": duplicate,
+            "scans": entry["scans"],
+            "first_seen": _iso(entry["first_seen"]),
+            "first_scanner": entry["scanner"],
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+def make_handler(service: CheckinService, token: str | None = None):
+    """Crea el handler HTTP ligado a un `CheckinService`.
+
+    Si se indica `token`, las peticiones sin ese token reciben 401.
+    """
+
+    class CheckinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, path: str, params: dict):
+            if token:
+                sent = self.headers.get("X-Checkin-Token") or params.get("token") or ""
+                if not hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8")):
+                    self._send(401, {"error": "Token no válido"})
+                    return
+            code = (params.get("code") or "").strip()
+            if not code:
+                self._send(400, {"error": "Falta el parámetro 'code'"})
+            elif path == "/verify":
+                self._send(*service.lookup(code))
+            elif path == "/checkin":
+                self._send(*service.checkin(code, params.get("scanner") or ""))
+            else:
+                self._send(404, {"error": "Ruta no encontrada"})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self._dispatch(url.path, params)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send(400, {"error": "JSON inválido"})
+                return
+            if not isinstance(params, dict):
+                self._send(400, {"error": "JSON inválido"})
+                return
+            self._dispatch(url.path, {k: str(v) for k, v in params.items()})
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return CheckinHandler
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="pkpass_builder.verify",
+        description="Servicio local de verificación y check-in de los QR generados",
+    )
+    parser.add_argument(
+        "index",
+        nargs="?",
+        default=str(Path(OUTPUT_DIR) / CHECKIN_INDEX_FILENAME),
+        help=f"Índice generado (por defecto: output/{CHECKIN_INDEX_FILENAME})",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Interfaz de escucha (por defecto: 127.0.0.1; otra requiere --token)",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.getenv("CHECKIN_TOKEN"),
+        help="Token compartido que deben enviar los escáneres (o variable CHECKIN_TOKEN)",
+    )
+    parser.add_argument("--port", type=int, default=8080, help="Puerto (por defecto: 8080)")
+    args = parser.parse_args()
+
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        logger.error(
+            f"Error: escuchar en {args.host} expone nombres y check-ins a toda la red; "
+            "indica un token con --token o CHECKIN_TOKEN"
+        )
+        raise SystemExit(1)
+
+    if not Path(args.index).exists():
+        logger.error(f"Error: índice no encontrado: {args.index}")
+        raise SystemExit(1)
+
+    service = CheckinService(args.index)
+    logger.info(
+        f"Índice cargado: {len(service.passes)} pases, {len(service.checkins)} check-ins previos"
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service, args.token))
+    server.daemon_threads = True
+    logger.info(f"Escuchando en http://{args.host}:{args.port} (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Servicio detenido")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
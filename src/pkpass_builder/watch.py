@@ -0,0 +1,212 @@
+"""Modo watch para mostradores de acreditación.
+
+Mantiene el contexto de generación (assets y certificados) en memoria y vigila
+un fichero JSON o un directorio de JSON. En cada cambio solo se generan los
+registros nuevos o modificados.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+
+from .generate import (
+    PassContext,
+    generate_pass,
+    persona_from_dict,
+    plan_jobs,
+    write_pass_result,
+)
+from .verify import CHECKIN_INDEX_FILENAME, remove_from_index, write_index
+
+logger = logging.getLogger(__name__)
+
+
+def record_key(item: dict) -> str:
+    """Identidad estable de un registro: `token`, o si no `correo`/`acreditacion`."""
+    return str(item.get("token") or item.get("correo") or item.get("acreditacion"))
+
+
+def record_fingerprint(item: dict) -> str:
+    """Huella del contenido de un registro para detectar modificaciones."""
+    return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+class Watcher:
+    """Vigila una fuente de personas y genera solo lo que ha cambiado.
+
+    Usa sondeo por `stat` (sin dependencias extra): entre cambios solo cuesta
+    un `stat` por fichero vigilado.
+    """
+
+    def __init__(
+        self,
+        source: Path,
+        output_dir: Path,
+        context: PassContext,
+        use_acreditacion: bool = False,
+        both_mode: bool = False,
+        interval: float = 0.2,
+        writer=None,
+        cache=None,
+    ):
+        self.source = Path(source)
+        self.output_dir = Path(output_dir)
+        self.context = context
+        self.use_acreditacion = use_acreditacion
+        self.both_mode = both_mode
+        self.interval = interval
+        self.writer = writer
+        self.cache = cache
+
+        self._stats: dict[Path, tuple[int, int]] = {}
+        self._seen: dict[str, str] = {}
+        # Claves de cada fichero y contenidos de QR de cada clave, para retirar del
+        # índice los registros que desaparecen o cambian de correo/acreditación
+        self._keys_by_source: dict[Path, set[str]] = {}
+        self._payloads: dict[str, set[str]] = {}
+        self._errors_seen = 0
+
+    def _sources(self) -> list[Path]:
+        if self.source.is_dir():
+            return sorted(self.source.glob("*.json"))
+        return [self.source] if self.source.exists() else []
+
+    def _changed_sources(self) -> list[Path]:
+        sources = self._sources()
+        # Ficheros borrados del directorio: sus registros desaparecen
+        changed = [path for path in self._keys_by_source if path not in sources]
+        for path in changed:
+            self._stats.pop(path, None)
+        for path in sources:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            signature = (st.st_mtime_ns, st.st_size)
+            if self._stats.get(path) != signature:
+                self._stats[path] = signature
+                changed.append(path)
+        return changed
+
+    def _load(self, path: Path) -> list[dict] | None:
+        """Registros del fichero; None si no se puede leer (se reintenta en el próximo cambio)."""
+        if not path.exists():
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            # Puede estar a medio guardar o en otra codificación
+            logger.warning(f"No se pudo leer {path.name}: {e}")
+            return None
+        if not isinstance(data, list):
+            logger.warning(f"{path.name} no contiene una lista de personas")
+            return None
+        records = [item for item in data if isinstance(item, dict)]
+        if len(records) != len(data):
+            logger.warning(f"{path.name}: {len(data) - len(records)} elementos no son registros")
+        return records
+
+    def poll_once(self) -> int:
+        """Procesa los cambios pendientes. Devuelve el número de pases generados."""
+        generados = []
+        stale: set[str] = set()
+        for path in self._changed_sources():
+            items = self._load(path)
+            if items is None:
+                # Sin datos válidos: se vuelve a intentar cuando cambie (se conserva
+                # su firma de stat para no releerlo en cada sondeo)
+                continue
+
+            keys = set()
+            for item in items:
+                key = record_key(item)
+                keys.add(key)
+                fingerprint = record_fingerprint(item)
+                if self._seen.get(key) == fingerprint:
+                    continue
+
+                persona = persona_from_dict(item)
+                jobs = plan_jobs(persona, self.use_acreditacion, self.both_mode)
+                payloads = {job.id_used for job in jobs}
+                stale |= self._payloads.get(key, set()) - payloads
+                self._payloads[key] = payloads
+
+                ok = True
+                for job in jobs:
+                    start = time.perf_counter()
+                    try:
+                        result = generate_pass(
+                            persona, job.use_acreditacion, self.context, self.cache
+                        )
+                        pkpass_path = write_pass_result(self.output_dir, job, result, self.writer)
+                    except Exception:
+                        logger.exception("Error generando %s para %s", job.tipo, job.id_used)
+                        ok = False
+                        continue
+                    generados.append((key, job))
+                    logger.info(
+                        "[WATCH] %s %s — fichero: %s (%.0f ms)",
+                        job.tipo,
+                        persona.nombre,
+                        pkpass_path.name,
+                        (time.perf_counter() - start) * 1000,
+                    )
+
+                # Si falla, no se marca como visto para reintentarlo en el siguiente cambio
+                if ok:
+                    self._seen[key] = fingerprint
+
+            # Registros que ya no están en el fichero (ni en ningún otro vigilado)
+            previous = self._keys_by_source.get(path, set())
+            if keys:
+                self._keys_by_source[path] = keys
+            else:
+                self._keys_by_source.pop(path, None)
+            remaining = set().union(*self._keys_by_source.values())
+            for key in previous - keys - remaining:
+                self._seen.pop(key, None)
+                stale |= self._payloads.pop(key, set())
+                logger.info(f"[WATCH] registro eliminado: {key}")
+
+        if self.writer is not None:
+            self.writer.flush()
+            errors = self.writer.errors[self._errors_seen :]
+            self._errors_seen = len(self.writer.errors)
+            if errors:
+                # Si el .pkpass o el QR no llegó a disco, el pase no entra en el
+                # índice y el registro se reintenta en el próximo cambio
+                failed = {(path.parent.name, path.stem) for path, _ in errors}
+                for key, job in generados:
+                    if (job.subfolder, job.file_base) in failed:
+                        self._seen.pop(key, None)
+                        logger.error("[WATCH] no se pudo escribir %s de %s", job.tipo, job.id_used)
+                generados = [
+                    (key, job)
+                    for key, job in generados
+                    if (job.subfolder, job.file_base) not in failed
+                ]
+
+        index_path = self.output_dir / CHECKIN_INDEX_FILENAME
+        # Un contenido de QR que otro registro sigue usando no se retira
+        if stale:
+            stale -= set().union(*self._payloads.values())
+            remove_from_index(index_path, stale)
+        # Los nuevos pases quedan verificables en la entrada al momento
+        write_index(index_path, (job for _, job in generados))
+        return len(generados)
+
+    def run(self):
+        """Bucle principal; termina con Ctrl+C."""
+        logger.info(f"Vigilando {self.source} (cada {self.interval}s). Ctrl+C para salir")
+        try:
+            while True:
+                try:
+                    self.poll_once()
+                except Exception:
+                    # Un registro o fichero defectuoso no debe parar el mostrador
+                    logger.exception("[WATCH] Error procesando cambios")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info(f"Modo watch detenido. Registros procesados: {len(self._seen)}")
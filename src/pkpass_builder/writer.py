@@ -0,0 +1,198 @@
+"""Escritura de salida en segundo plano.
+
+`PassWriter` recibe (ruta, bytes) desde el bucle de generación a través de una
+cola acotada y los escribe en un hilo aparte, de forma que el trabajo de CPU
+del siguiente pase se solapa con la E/S del anterior (útil sobre todo cuando
+`output/` está en un sistema de ficheros de red).
+
+Cada fichero se escribe con un nombre temporal y se renombra de forma atómica
+al final, así que un corte a mitad de escritura nunca deja un `.pkpass`
+truncado con nombre válido. Los fsync se agrupan por lotes.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class PassWriter:
+    """Escritor asíncrono con cola acotada, renombrado atómico y fsync por lotes.
+
+    Args:
+        max_pending: Tamaño máximo de la cola; `submit` bloquea si está llena
+        batch_size: Ficheros por lote de fsync (también es el máximo de
+            descriptores abiertos a la vez por el escritor)
+        fsync: Si es False no se fuerza a disco (más rápido, menos seguro)
+        skip_unchanged: No reescribir ficheros cuyo contenido ya es idéntico (para
+            `.pkpass` con digest, basta con que coincida el contenido sin firmar
+            y que el existente esté firmado con `signer_cert`)
+        signer_cert: Certificado de firma actual en DER (ver `certificate_der`)
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 128,
+        batch_size: int = 16,
+        fsync: bool = True,
+        skip_unchanged: bool = False,
+        signer_cert: bytes | None = None,
+    ):
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.skip_unchanged = skip_unchanged
+        self.signer_cert = signer_cert
+
+        self.written = 0
+        self.skipped = 0
+        self.errors: list[tuple[Path, Exception]] = []
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="pkpass-writer", daemon=True)
+        self._thread.start()
+
+    # --- API del productor -------------------------------------------------
+
+    def submit(self, path: str | Path, data: bytes, digest: str | None = None):
+        """Encola un fichero para escribir. Bloquea si la cola está llena.
+
+        `digest` es el `PassResult.digest` de un `.pkpass`: con `skip_unchanged`
+        se compara con el del fichero existente en vez de los bytes, que cambian
+        en cada firma.
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("El escritor de salida ya está cerrado")
+        self._queue.put((Path(path), data, digest))
+
+    def flush(self):
+        """Espera a que todo lo encolado hasta ahora esté en disco."""
+        self._queue.join()
+
+    def close(self):
+        """Vacía la cola y detiene el hilo escritor."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Hilo escritor -----------------------------------------------------
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            # Agrupar lo que ya esté esperando, sin bloquear
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            items = []
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                else:
+                    items.append(item)
+
+            try:
+                self._write_batch(items)
+            except Exception as e:
+                logger.exception("Error inesperado en el escritor de salida")
+                self.errors.extend((item[0], e) for item in items)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _is_unchanged(self, path: Path, data: bytes, digest: str | None) -> bool:
+        if digest and self.signer_cert:
+            import zipfile
+
+            try:
+                with zipfile.ZipFile(path) as zf:
+                    if hashlib.sha256(zf.read("manifest.json")).hexdigest() != digest:
+                        return False
+                    # El manifest no cubre la firma: tras renovar el certificado
+                    # hay que volver a firmar aunque el contenido sea el mismo
+                    return self.signer_cert in zf.read("signature")
+            except Exception:
+                # No existe, está corrupto o es de otro formato: se reescribe
+                return False
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(data).digest()
+        except FileNotFoundError:
+            return False
+
+    def _write_batch(self, items: list[tuple[Path, bytes, str | None]]):
+        # Si la misma ruta llega dos veces en el lote, gana la última
+        latest = {path: (data, digest) for path, data, digest in items}
+
+        pending = []  # (ruta final, ruta temporal, fd)
+        for path, (data, digest) in latest.items():
+            if self.skip_unchanged and self._is_unchanged(path, data, digest):
+                self.skipped += 1
+                continue
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view) :]
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except Exception as e:
+                logger.exception("Error escribiendo %s", path)
+                self.errors.append((path, e))
+                tmp_path.unlink(missing_ok=True)
+                continue
+            pending.append((path, tmp_path, fd))
+
+        # Un único paso de fsync para todo el lote, después los renombrados
+        dirs = set()
+        for path, tmp_path, fd in pending:
+            try:
+                try:
+                    if self.fsync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+                os.replace(tmp_path, path)
+                dirs.add(path.parent)
+                self.written += 1
+            except Exception as e:
+                logger.exception("Error escribiendo %s", path)
+                self.errors.append((path, e))
+                tmp_path.unlink(missing_ok=True)
+
+        if self.fsync:
+            for directory in dirs:
+                _fsync_dir(directory)
+
+
+def _fsync_dir(directory: Path):
+    """Persiste las entradas renombradas del directorio (no disponible en Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)